@@ -0,0 +1,277 @@
+import os
+import glob
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from app.collectors.kucoin_collector import OHLC_BARS
+
+
+class RSIBacktester:
+    """
+    Replays the RSI signal rules of run_assets.py (sell) and run_breakouts.py (buy)
+    over stored daily candles for every pair of thresholds in a grid.
+
+    A symbol signals on a day when its daily RSI >= the 1D threshold and its weekly
+    RSI >= the 7D threshold, as in current_asset_analysis. The weekly RSI includes the
+    still-open week up to that day, as the live KuCoin '1week' candles do. Both RSIs are
+    computed like the live scan: IndicatorKernel's RSI (pandas_ta's RMA) over the last
+    `rsi_window` candles. Sell signals count as hits when the forward return is
+    negative, buy signals when it is positive.
+
+    All grid points are evaluated in one vectorized pass: each observation is binned by
+    how many thresholds it clears, and a 2D suffix sum over the bins gives the signal
+    count, hits and summed returns for every threshold pair.
+    """
+
+    CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, data_dir=None, rsi_period=14, week_anchor='W-SUN', rsi_window=OHLC_BARS):
+        self.data_dir = data_dir or os.getenv('BACKTEST_DATA_DIR', 'data/candles')
+        self.rsi_period = rsi_period
+        self.week_anchor = week_anchor
+        self.rsi_window = rsi_window
+
+    # --- Candle storage ---
+
+    def load_closes(self, symbols=None):
+        """
+        Load daily closes from '<data_dir>/<SYMBOL>.csv' files into a (days x symbols) DataFrame.
+        Timestamps may be unix seconds or ISO dates.
+        """
+        if symbols is None:
+            paths = sorted(glob.glob(os.path.join(self.data_dir, '*.csv')))
+        else:
+            paths = [os.path.join(self.data_dir, f"{symbol.upper()}.csv") for symbol in symbols]
+
+        closes = {}
+        for path in paths:
+            symbol = os.path.splitext(os.path.basename(path))[0].upper()
+            if not os.path.exists(path):
+                print(f"  - No candle file for {symbol} ({path}), skipping.")
+                continue
+            df = pd.read_csv(path)
+            timestamps = df['timestamp']
+            if pd.api.types.is_numeric_dtype(timestamps):
+                index = pd.to_datetime(timestamps, unit='s')
+            else:
+                index = pd.to_datetime(timestamps)
+            series = pd.Series(df['close'].astype(float).to_numpy(), index=index.dt.normalize())
+            closes[symbol] = series[~series.index.duplicated(keep='last')].sort_index()
+
+        if not closes:
+            return pd.DataFrame()
+        return pd.DataFrame(closes).sort_index()
+
+    def download(self, symbols, days=1500, client=None):
+        """Fetch daily KuCoin candles for symbols and store them as CSV files in data_dir."""
+        if client is None:
+            from kucoin.client import Market
+            client = Market(url='https://api.kucoin.com')
+        os.makedirs(self.data_dir, exist_ok=True)
+        end = int(time.time())
+        start = end - days * 86400
+        for symbol in symbols:
+            rows = []
+            window_end = end
+            # KuCoin returns at most 1500 candles per request, newest first
+            while window_end > start:
+                window_start = max(start, window_end - 1500 * 86400)
+                try:
+                    klines = client.get_kline(f"{symbol.upper()}-USDT", '1day', startAt=window_start, endAt=window_end)
+                except Exception as e:
+                    print(f"  - Error fetching candles for {symbol}: {e}")
+                    break
+                if not klines:
+                    break
+                rows.extend(klines)
+                window_end = window_start
+                time.sleep(0.2)  # Basic rate limiting
+            if not rows:
+                print(f"  - No candles for {symbol}")
+                continue
+            df = pd.DataFrame(rows, columns=['timestamp', 'open', 'close', 'high', 'low', 'volume', 'amount'])
+            df = df[self.CANDLE_COLUMNS].astype(float).drop_duplicates('timestamp').sort_values('timestamp')
+            df['timestamp'] = df['timestamp'].astype(int)
+            df.to_csv(os.path.join(self.data_dir, f"{symbol.upper()}.csv"), index=False)
+            print(f"  ✓ Stored {len(df)} daily candles for {symbol}")
+
+    # --- Indicators ---
+
+    def _rma_sums(self, values, bars):
+        """
+        RSI gain and loss sums at every position of a series, over the changes within the
+        `bars` candles ending there, weighted like pandas_ta's RMA: the newest change has
+        weight 1 and each older one (1 - 1/period) times less. These are the numerators
+        IndicatorKernel accumulates on a series cut to those candles.
+        """
+        alpha = 1 / self.rsi_period
+        changes = np.diff(values, prepend=values[:1])
+        sums = []
+        for moves in (np.clip(changes, 0, None), np.clip(-changes, 0, None)):
+            # ewm(adjust=False) from a 0 start is the running weighted sum times alpha
+            running = pd.Series(moves).ewm(alpha=alpha, adjust=False).mean().to_numpy() / alpha
+            windowed = running.copy()
+            drop = bars - 1
+            if 0 < drop < len(running):
+                windowed[drop:] -= (1 - alpha) ** drop * running[:-drop]
+            sums.append(np.maximum(windowed, 0.0))
+        return sums
+
+    def _rsi(self, gain, loss, bars):
+        """RSI from RMA sums; NaN without more than `rsi_period` candles or without any price change."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 * gain / (gain + loss)
+        rsi[bars <= self.rsi_period] = np.nan
+        return rsi
+
+    def _daily_column(self, series):
+        values = series.dropna()
+        closes = values.to_numpy()
+        gain, loss = self._rma_sums(closes, self.rsi_window)
+        bars = np.minimum(np.arange(1, len(closes) + 1), self.rsi_window)
+        return pd.Series(self._rsi(gain, loss, bars), index=values.index).reindex(series.index)
+
+    def _weekly_column(self, series):
+        values = series.dropna()
+        weekly_closes = values.resample(self.week_anchor).last().dropna()
+        # Completed weeks: sums over the window minus the open week, ending at each week
+        gain, loss = self._rma_sums(weekly_closes.to_numpy(), self.rsi_window - 1)
+
+        # Position of each day's (open) week, and the state at the end of the previous week
+        week = weekly_closes.index.get_indexer(values.index.to_period(self.week_anchor).end_time.normalize())
+        previous = week - 1
+        has_previous = previous >= 0
+        previous = np.where(has_previous, previous, 0)
+        prev_close = np.where(has_previous, weekly_closes.to_numpy()[previous], np.nan)
+        prev_gain = np.where(has_previous, gain[previous], 0.0)
+        prev_loss = np.where(has_previous, loss[previous], 0.0)
+
+        change = values.to_numpy() - prev_close
+        decay = 1 - 1 / self.rsi_period
+        open_gain = decay * prev_gain + np.clip(change, 0, None)
+        open_loss = decay * prev_loss + np.clip(-change, 0, None)
+        bars = np.minimum(week + 1, self.rsi_window)
+        return pd.Series(self._rsi(open_gain, open_loss, bars), index=values.index).reindex(series.index)
+
+    def daily_rsi(self, closes):
+        """Daily RSI for every symbol and day, as the live scan computes it on that day's candles."""
+        return closes.apply(self._daily_column)
+
+    def weekly_rsi(self, closes):
+        """
+        Weekly RSI as seen on each day: the completed weeks' RMA sums updated with the
+        still-open week's change up to that day's close.
+        """
+        return closes.apply(self._weekly_column)
+
+    # --- Grid evaluation ---
+
+    def evaluate(self, closes, rsi_1d_grid, rsi_7d_grid, horizons=(1, 7, 30), rule='sell'):
+        """
+        Evaluate every (1D, 7D) threshold pair.
+        Returns a DataFrame with one row per pair: signal count, and per horizon the
+        number of signals with a known forward return, hit rate and mean forward return (%).
+        """
+        grid_1d = np.sort(np.asarray(rsi_1d_grid, dtype=float))
+        grid_7d = np.sort(np.asarray(rsi_7d_grid, dtype=float))
+        rsi_1d = self.daily_rsi(closes).to_numpy()
+        rsi_7d = self.weekly_rsi(closes).to_numpy()
+        values = closes.to_numpy()
+
+        valid = np.isfinite(rsi_1d) & np.isfinite(rsi_7d)
+        # Bin = number of thresholds the observation clears on each axis
+        bin_1d = np.searchsorted(grid_1d, rsi_1d[valid], side='right')
+        bin_7d = np.searchsorted(grid_7d, rsi_7d[valid], side='right')
+        shape = (len(grid_1d) + 1, len(grid_7d) + 1)
+        flat_bins = np.ravel_multi_index((bin_1d, bin_7d), shape)
+
+        def suffix_sum(weights=None):
+            """Sum of weights over observations clearing threshold (i, j), for every i, j."""
+            counts = np.bincount(flat_bins, weights=weights, minlength=shape[0] * shape[1]).reshape(shape)
+            totals = counts[::-1, ::-1].cumsum(axis=0).cumsum(axis=1)[::-1, ::-1]
+            return totals[1:, 1:]
+
+        result = {
+            'rule': rule,
+            'rsi_1d_threshold': np.repeat(grid_1d, len(grid_7d)),
+            'rsi_7d_threshold': np.tile(grid_7d, len(grid_1d)),
+            'signals': suffix_sum().ravel().astype(int),
+        }
+        for horizon in horizons:
+            forward = np.full_like(values, np.nan)
+            if horizon < len(values):
+                forward[:-horizon] = values[horizon:] / values[:-horizon] - 1
+            forward = forward[valid]
+            known = np.isfinite(forward)
+            hit = (forward < 0) if rule == 'sell' else (forward > 0)
+            with_return = suffix_sum(known.astype(float))
+            hits = suffix_sum((hit & known).astype(float))
+            returns = suffix_sum(np.where(known, forward, 0.0))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[f'signals_{horizon}d'] = with_return.ravel().astype(int)
+                result[f'hit_rate_{horizon}d'] = (hits / with_return).ravel()
+                result[f'avg_return_{horizon}d'] = (returns / with_return * 100).ravel()
+        return pd.DataFrame(result)
+
+
+def _grid(values):
+    """Turn a [start, stop, step] CLI argument into an inclusive grid."""
+    start, stop, step = values
+    return np.arange(start, stop + step / 2, step)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Backtest RSI buy/sell thresholds on stored daily candles.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    download_parser = subparsers.add_parser('download', help="Fetch daily KuCoin candles into the data directory")
+    download_parser.add_argument('--symbols', nargs='+', required=True)
+    download_parser.add_argument('--days', type=int, default=1500)
+    download_parser.add_argument('--data-dir', default=None)
+
+    run_parser = subparsers.add_parser('run', help="Evaluate a threshold grid offline")
+    run_parser.add_argument('--rule', choices=['sell', 'buy'], default='sell')
+    run_parser.add_argument('--symbols', nargs='+', default=None, help="Default: every stored symbol")
+    run_parser.add_argument('--data-dir', default=None)
+    run_parser.add_argument('--grid-1d', nargs=3, type=float, default=[50, 95, 5], metavar=('START', 'STOP', 'STEP'))
+    run_parser.add_argument('--grid-7d', nargs=3, type=float, default=[50, 95, 5], metavar=('START', 'STOP', 'STEP'))
+    run_parser.add_argument('--horizons', nargs='+', type=int, default=[1, 7, 30])
+    run_parser.add_argument('--top', type=int, default=15, help="Rows to print, best hit rate first")
+    run_parser.add_argument('--out', default=None, help="Write the full grid to this CSV file")
+    args = parser.parse_args()
+
+    backtester = RSIBacktester(data_dir=args.data_dir)
+    if args.command == 'download':
+        backtester.download(args.symbols, days=args.days)
+    else:
+        closes = backtester.load_closes(args.symbols)
+        if closes.empty:
+            print(f"No candle files found in {backtester.data_dir}.")
+            raise SystemExit(1)
+        print(f"Loaded {closes.shape[1]} symbols x {closes.shape[0]} days "
+              f"({closes.index.min().date()} to {closes.index.max().date()})")
+
+        start = time.perf_counter()
+        results = backtester.evaluate(closes, _grid(args.grid_1d), _grid(args.grid_7d), args.horizons, args.rule)
+        print(f"Evaluated {len(results)} threshold pairs in {time.perf_counter() - start:.3f}s")
+
+        # Current settings from the environment, for comparison
+        prefix = 'RSI_SELL' if args.rule == 'sell' else 'RSI_BUY'
+        current_1d = float(os.getenv(f'{prefix}_1D_THRESHOLD', '80' if args.rule == 'sell' else '50'))
+        current_7d = float(os.getenv(f'{prefix}_7D_THRESHOLD', '70' if args.rule == 'sell' else '50'))
+        current = results[(results['rsi_1d_threshold'] == current_1d) & (results['rsi_7d_threshold'] == current_7d)]
+
+        sort_column = f'hit_rate_{args.horizons[-1]}d'
+        with pd.option_context('display.max_columns', None, 'display.width', 200, 'display.float_format', '{:.3f}'.format):
+            print(results[results['signals'] > 0].sort_values(sort_column, ascending=False).head(args.top).to_string(index=False))
+            if not current.empty:
+                print(f"\nCurrent {prefix}_1D/7D thresholds ({current_1d:g}/{current_7d:g}):")
+                print(current.to_string(index=False))
+
+        if args.out:
+            results.to_csv(args.out, index=False)
+            print(f"Full grid written to {args.out}")
@@ -1,10 +1,30 @@
 import os
 import json
-import openai
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from tiktoken import encoding_for_model
+from app.monitoring.metrics import metrics
+
+# openai and tiktoken are slow to import, so they are loaded only when GPT analysis actually runs
+
+def _transient_errors():
+    """Errors worth retrying: the request may succeed if sent again after a short pause."""
+    import openai
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+class PromptTooLargeError(Exception):
+    """No model in the chain has a context window large enough for the prompt."""
 
 class GPTAnalyzer:
+    # Most recent latencies the hedge percentile is taken over
+    LATENCY_SAMPLES = 50
+
     def __init__(self):
         # Initialize OpenAI client if API key is available
         api_key = os.getenv('OPENAI_API_KEY')
@@ -12,6 +32,7 @@ class GPTAnalyzer:
             self.client = None
             print("OpenAI API key not found, GPT analysis will be disabled")
         else:
+            import openai
             self.client = openai.OpenAI(api_key=api_key)
             
         # Default to GPT-4o mini (almost free) model
@@ -26,9 +47,51 @@ class GPTAnalyzer:
             "gpt-5-nano": 400000
         }
         self.enable_kucoin_ta = os.getenv('ENABLE_KUCOIN_TA', 'false').lower() == 'true'
-        
+
+        # Deadline, retry and hedging policy for the completion call
+        self.request_timeout = float(os.getenv('GPT_TIMEOUT_SECONDS', '120'))
+        self.max_retries = int(os.getenv('GPT_MAX_RETRIES', '3'))
+        self.retry_base_delay = float(os.getenv('GPT_RETRY_BASE_DELAY', '1'))
+        self.retry_max_delay = float(os.getenv('GPT_RETRY_MAX_DELAY', '30'))
+        self.run_budget = float(os.getenv('GPT_RUN_BUDGET_SECONDS', '600'))
+        # Hedge after this many seconds until enough latencies are known for the percentile
+        self.hedge_after = float(os.getenv('GPT_HEDGE_AFTER_SECONDS', '0')) # 0 disables hedging
+        self.hedge_percentile = float(os.getenv('GPT_HEDGE_PERCENTILE', '95'))
+        # analyze() runs once per process, so latencies are kept in the run history to reach the sample count
+        self.history = None
+        self.latencies = self._load_latencies()
+        # Models tried in order after self.model; only models listed in model_limits are used
+        fallback_models = os.getenv('GPT_FALLBACK_MODELS', 'gpt-4o-mini')
+        self.fallback_models = [m.strip() for m in fallback_models.split(',') if m.strip()]
+        # Tokens of the last prompt built by _build_prompt (system message + coin data)
+        self.prompt_tokens = None
+
+    def _load_latencies(self):
+        """Recent GPT latencies from earlier runs (RUN_HISTORY_PATH), newest last; empty when hedging is off."""
+        history_path = os.getenv('RUN_HISTORY_PATH', '.state/run_history.sqlite')
+        if self.hedge_after <= 0 or not history_path:
+            return []
+        try:
+            from app.state.run_history import RunHistoryStore
+            self.history = RunHistoryStore(path=history_path)
+            return self.history.recent_latencies(self.LATENCY_SAMPLES)
+        except Exception as e:
+            print(f"Error loading GPT latencies from {history_path}: {e}. Using GPT_HEDGE_AFTER_SECONDS.")
+            return []
+
+    def _record_latency(self, model, seconds):
+        """Remember a successful request's latency for this run and, if configured, for later runs."""
+        self.latencies = (self.latencies + [seconds])[-self.LATENCY_SAMPLES:]
+        if self.history is None:
+            return
+        try:
+            self.history.record_latency(model, seconds)
+        except Exception as e:
+            print(f"Error recording GPT latency: {e}")
+
     def count_tokens(self, text, model):
         """Count tokens for a given text and model"""
+        from tiktoken import encoding_for_model
         try:
             enc = encoding_for_model(model)
             return len(enc.encode(text))
@@ -88,11 +151,21 @@ Format the output as a valid JSON array.
             coins_data_str += f"  Price Change (7d): {coin.get('price_change_7d', 'N/A')}%\n"
             coins_data_str += f"  Trending: {'Yes' if coin.get('is_trending') else 'No'}\n"
             coins_data_str += f"  Social Mentions: {coin.get('social_mentions', 'N/A')}\n"
-            coins_data_str += f"  Social Sentiment: {coin.get('social_sentiment', 'N/A')}\n"
-            # Conditionally add RSI data if enabled
+            sentiment = coin.get('social_sentiment')
+            coins_data_str += f"  Social Sentiment: {'N/A' if sentiment is None else f'{sentiment} (-1 bearish .. 1 bullish)'}\n"
+            # Conditionally add TA data if enabled
             if self.enable_kucoin_ta:
                 coins_data_str += f"  RSI (1d): {coin.get('rsi_1d', 'N/A')}\n"
                 coins_data_str += f"  RSI (7d): {coin.get('rsi_7d', 'N/A')}\n"
+                for label, key, unit in (('Bollinger Band Width (1d)', 'bb_width_1d', '%'),
+                                         ('ATR (1d)', 'atr_pct_1d', '% of price'),
+                                         ('Volume Z-Score (1d)', 'volume_zscore_1d', ''),
+                                         ('OBV Trend (1d)', 'obv_trend_1d', '')):
+                    value = coin.get(key)
+                    coins_data_str += f"  {label}: {'N/A' if value is None else f'{value}{unit}'}\n"
+            previous_scores = coin.get('previous_scores')
+            if previous_scores:
+                coins_data_str += f"  Previous Breakout Scores (oldest first): {', '.join(f'{score:g}' for score in previous_scores)}\n"
             coins_data_str += "\n"
 
         # Combine system message and coin data for the user prompt content
@@ -101,10 +174,13 @@ Format the output as a valid JSON array.
         # Check token count against model limit
         max_tokens = self.model_limits.get(self.model, 4096) # Default fallback limit
         # Estimate tokens for system message and response buffer
-        overhead_tokens = self.count_tokens(system_message, self.model) + 500 # Add buffer for response
+        system_tokens = self.count_tokens(system_message, self.model)
+        overhead_tokens = system_tokens + 500 # Add buffer for response
         available_tokens = max_tokens - overhead_tokens
 
         content_tokens = self.count_tokens(prompt_content, self.model)
+        # Reused by analyze() for the per-model context checks instead of tokenizing again
+        self.prompt_tokens = system_tokens + content_tokens
 
         # If content exceeds available tokens, we might need to truncate or handle it
         # For now, we'll just print a warning if it's close or over
@@ -117,6 +193,118 @@ Format the output as a valid JSON array.
 
         return system_message, prompt_content
 
+    def _model_chain(self):
+        """Primary model followed by the configured fallbacks that have a known context limit."""
+        chain = [self.model]
+        for model in self.fallback_models:
+            if model in chain:
+                continue
+            if model not in self.model_limits:
+                print(f"  - Ignoring fallback model {model}: not listed in model_limits.")
+                continue
+            chain.append(model)
+        return chain
+
+    def _hedge_delay(self):
+        """Seconds to wait for the first request before sending a hedged duplicate."""
+        if self.hedge_after <= 0:
+            return None
+        if len(self.latencies) < 5:
+            return self.hedge_after
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    def _retry_delay(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+    def _create_completion(self, model, messages, timeout):
+        """Send a single completion request with its own timeout and no client-side retries."""
+        client = self.client.with_options(timeout=timeout, max_retries=0)
+        metrics.count('gpt.requests')
+        with metrics.span('gpt.request'):
+            return client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"}, # Enforce JSON output
+                temperature=1 if model == "gpt-5-nano" else 0.2 # Adjust temperature for desired creativity/consistency
+            )
+
+    def _hedged_completion(self, model, messages, timeout):
+        """
+        Send a request and, if it is slower than the hedge delay, a duplicate.
+        Returns the first successful response; raises the last error if all fail.
+        """
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            start = time.monotonic()
+            pending = {executor.submit(self._create_completion, model, messages, timeout)}
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, pending = wait(pending, timeout=hedge_delay)
+                if not done:
+                    print(f"  - No response from {model} after {hedge_delay:.1f}s, sending hedged request...")
+                    metrics.count('gpt.hedges')
+                    remaining = max(0.1, timeout - (time.monotonic() - start))
+                    pending.add(executor.submit(self._create_completion, model, messages, remaining))
+                pending |= done
+
+            last_error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    self._record_latency(model, time.monotonic() - start)
+                    return response
+            raise last_error
+        finally:
+            # Do not block on a stalled duplicate; its own timeout ends it
+            executor.shutdown(wait=False)
+
+    def _complete_with_deadline(self, messages, prompt_tokens):
+        """
+        Run the completion through the model chain with per-call deadlines and
+        jittered retries, all bound to the total run budget.
+        Returns (response, model) or raises the last error.
+        """
+        import openai
+        transient_errors = _transient_errors()
+        deadline = time.monotonic() + self.run_budget
+        last_error = None
+        for model in self._model_chain():
+            # The configured primary is always tried; fallbacks only when they are known to fit
+            if model != self.model and prompt_tokens is not None and prompt_tokens >= self.model_limits[model]:
+                print(f"  - Skipping {model}: prompt ({prompt_tokens} tokens) exceeds its context limit.")
+                continue
+            for attempt in range(self.max_retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"GPT run budget of {self.run_budget:.0f}s exhausted") from last_error
+                try:
+                    return self._hedged_completion(model, messages, min(self.request_timeout, remaining)), model
+                except transient_errors as e:
+                    last_error = e
+                    print(f"  - Transient error from {model} (attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+                    metrics.count('gpt.errors')
+                    if attempt < self.max_retries:
+                        metrics.count('gpt.retries')
+                        time.sleep(min(self._retry_delay(attempt), max(0, deadline - time.monotonic())))
+                except openai.APIStatusError as e:
+                    # Non-transient (e.g. unknown model, bad request): move on to the next model
+                    last_error = e
+                    print(f"  - {model} rejected the request: {e}")
+                    break
+            print(f"  - Giving up on {model}.")
+            metrics.count('gpt.fallbacks')
+        if last_error is None:
+            raise PromptTooLargeError(f"No model in the fallback chain can fit the prompt ({prompt_tokens} tokens)")
+        raise last_error
+
     def analyze(self, formatted_data):
         """Analyze formatted data using GPT"""
         if not self.client:
@@ -126,21 +314,21 @@ Format the output as a valid JSON array.
             print("GPT analysis skipped: No formatted data provided.")
             return {"error": "No formatted data provided"}
 
+        import openai
         system_message, prompt_content = self._build_prompt(formatted_data)
+        analysis_json_str = None
 
         try:
             print(f"  - Sending {len(formatted_data)} coins to {self.model} for analysis...")
             start_time = datetime.now()
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt_content}
-                ],
-                response_format={"type": "json_object"}, # Enforce JSON output
-                temperature=1 if self.model == "gpt-5-nano" else 0.2 # Adjust temperature for desired creativity/consistency
-            )
+            messages = [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt_content}
+            ]
+            metrics.count('gpt.bytes_sent', len(system_message) + len(prompt_content))
+            with metrics.span('gpt.analyze'):
+                response, model_used = self._complete_with_deadline(messages, self.prompt_tokens)
 
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -148,6 +336,7 @@ Format the output as a valid JSON array.
 
             # Extract JSON content
             analysis_json_str = response.choices[0].message.content
+            metrics.count('gpt.bytes_received', len(analysis_json_str or ''))
             analysis_result = json.loads(analysis_json_str)
 
             # print(f"  - GPT response: {analysis_result}")
@@ -160,7 +349,7 @@ Format the output as a valid JSON array.
             # Add metadata
             result_with_metadata = {
                 'timestamp': datetime.now().isoformat(),
-                'model_used': self.model,
+                'model_used': model_used,
                 'analysis_time_seconds': duration,
                 'analysis': analysis_result['analysis'], # Extract just the list,
             }
@@ -172,11 +361,19 @@ Format the output as a valid JSON array.
                      'completion_tokens': response.usage.completion_tokens,
                      'total_tokens': response.usage.total_tokens
                  }
+                 metrics.count('gpt.tokens.prompt', response.usage.prompt_tokens)
+                 metrics.count('gpt.tokens.completion', response.usage.completion_tokens)
                  print(f"  - Token Usage: Prompt={response.usage.prompt_tokens}, Completion={response.usage.completion_tokens}, Total={response.usage.total_tokens}")
 
 
             return result_with_metadata
 
+        except PromptTooLargeError as e:
+            print(f"  ❌ Prompt too large for GPT analysis: {e}")
+            return {"error": f"Prompt too large: {e}"}
+        except TimeoutError as e:
+            print(f"  ❌ GPT analysis timed out: {e}")
+            return {"error": f"GPT analysis timed out: {e}"}
         except openai.APIError as e:
             print(f"  ❌ OpenAI API Error: {e}")
             return {"error": f"OpenAI API Error: {e}"}
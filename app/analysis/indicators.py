@@ -0,0 +1,190 @@
+import math
+import numpy as np
+
+# Fields of one indicator record; every value is a float (NaN when there is not enough data)
+INDICATOR_FIELDS = [
+    'rsi',
+    'macd_line', 'macd_signal', 'macd_histogram', 'prev_macd_histogram',
+    'bb_width',
+    'atr', 'atr_pct',
+    'volume_zscore',
+    'obv', 'prev_obv',
+]
+INDICATOR_DTYPE = np.dtype([(field, 'f8') for field in INDICATOR_FIELDS])
+
+
+class IndicatorKernel:
+    """
+    Computes RSI, MACD, Bollinger band width, ATR, volume z-score and OBV for an
+    OHLCV series in a single pass, writing the latest values into a preallocated
+    record of INDICATOR_DTYPE.
+
+    Every indicator is a running recurrence (Wilder averages, EMAs, rolling sums),
+    so adding one costs a few float operations per bar instead of another pass.
+    RSI matches pandas_ta, which the RSI alert thresholds were tuned on: Wilder's
+    alpha of 1/period applied as an adjusted EWM from the first price change (its
+    RMA), undefined for a flat series. The other conventions follow TA-Lib: ATR uses
+    Wilder smoothing seeded with a simple average, EMAs are seeded with an SMA, and
+    the Bollinger width is (upper - lower) / middle * 100 with a population standard deviation.
+    """
+
+    def __init__(self, rsi_period=14, macd_fast=12, macd_slow=26, macd_signal=9,
+                 bb_period=20, bb_std=2.0, atr_period=14, volume_period=20, obv_lookback=10):
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.atr_period = atr_period
+        self.volume_period = volume_period
+        self.obv_lookback = obv_lookback
+
+    @staticmethod
+    def new_record(size=None):
+        """A NaN-filled record (or array of `size` records) to compute into."""
+        return np.full(() if size is None else size, np.nan, dtype=INDICATOR_DTYPE)
+
+    def compute(self, open_, high, low, close, volume, out=None):
+        """
+        Compute the latest indicator values for one series (oldest bar first).
+        `out` may be a record from new_record() or a row of a record array; all of
+        its fields are overwritten in place and it is returned.
+        """
+        if out is None:
+            out = self.new_record()
+        high = list(map(float, high))
+        low = list(map(float, low))
+        close = list(map(float, close))
+        volume = list(map(float, volume))
+        n = len(close)
+        nan = math.nan
+
+        rsi_p = self.rsi_period
+        fast_p, slow_p, signal_p = self.macd_fast, self.macd_slow, self.macd_signal
+        fast_alpha, slow_alpha, signal_alpha = 2 / (fast_p + 1), 2 / (slow_p + 1), 2 / (signal_p + 1)
+        bb_p = self.bb_period
+        atr_p = self.atr_period
+        vol_p = self.volume_period
+        obv_mark = n - 1 - self.obv_lookback
+
+        # RMA numerators; the shared denominator cancels out of gain / (gain + loss)
+        rsi_decay = 1 - 1 / rsi_p
+        gain_sum = loss_sum = 0.0
+        ema_fast = ema_slow = signal = nan
+        fast_sum = slow_sum = signal_sum = 0.0
+        macd = histogram = prev_histogram = nan
+        macd_count = 0
+        # Rolling sums are taken relative to the first value to limit cancellation
+        close_shift = close[0] if n else 0.0
+        volume_shift = volume[0] if n else 0.0
+        bb_sum = bb_sumsq = vol_sum = vol_sumsq = 0.0
+        atr = 0.0
+        obv = 0.0
+        prev_obv = nan
+
+        for i in range(n):
+            c = close[i]
+
+            if i > 0:
+                prev_c = close[i - 1]
+                # RSI (pandas_ta RMA: ewm(alpha=1/period, adjust=True) of gains and losses)
+                change = c - prev_c
+                gain_sum *= rsi_decay
+                loss_sum *= rsi_decay
+                if change > 0:
+                    gain_sum += change
+                elif change < 0:
+                    loss_sum -= change
+
+                # ATR (Wilder average of the true range)
+                h, l = high[i], low[i]
+                true_range = max(h - l, abs(h - prev_c), abs(l - prev_c))
+                if i <= atr_p:
+                    atr += true_range
+                    if i == atr_p:
+                        atr /= atr_p
+                else:
+                    atr = (atr * (atr_p - 1) + true_range) / atr_p
+
+                # OBV
+                if change > 0:
+                    obv += volume[i]
+                elif change < 0:
+                    obv -= volume[i]
+            if i == obv_mark:
+                prev_obv = obv
+
+            # MACD: SMA-seeded EMAs, then an SMA-seeded EMA of the MACD line
+            if i < fast_p:
+                fast_sum += c
+                if i == fast_p - 1:
+                    ema_fast = fast_sum / fast_p
+            else:
+                ema_fast += fast_alpha * (c - ema_fast)
+            if i < slow_p:
+                slow_sum += c
+                if i == slow_p - 1:
+                    ema_slow = slow_sum / slow_p
+            else:
+                ema_slow += slow_alpha * (c - ema_slow)
+            if i >= slow_p - 1:
+                macd = ema_fast - ema_slow
+                macd_count += 1
+                if macd_count <= signal_p:
+                    signal_sum += macd
+                    if macd_count == signal_p:
+                        signal = signal_sum / signal_p
+                else:
+                    signal += signal_alpha * (macd - signal)
+                if macd_count >= signal_p:
+                    prev_histogram = histogram
+                    histogram = macd - signal
+
+            # Bollinger and volume windows
+            x = c - close_shift
+            bb_sum += x
+            bb_sumsq += x * x
+            if i >= bb_p:
+                old = close[i - bb_p] - close_shift
+                bb_sum -= old
+                bb_sumsq -= old * old
+            v = volume[i] - volume_shift
+            vol_sum += v
+            vol_sumsq += v * v
+            if i >= vol_p:
+                old = volume[i - vol_p] - volume_shift
+                vol_sum -= old
+                vol_sumsq -= old * old
+
+        values = dict.fromkeys(INDICATOR_FIELDS, nan)
+        if n > rsi_p and gain_sum + loss_sum > 0:
+            values['rsi'] = 100 * gain_sum / (gain_sum + loss_sum)
+        if macd_count:
+            values['macd_line'] = macd
+        if macd_count >= signal_p:
+            values['macd_signal'] = signal
+            values['macd_histogram'] = histogram
+            values['prev_macd_histogram'] = prev_histogram
+        if n >= bb_p:
+            mean = bb_sum / bb_p
+            std = math.sqrt(max(bb_sumsq / bb_p - mean * mean, 0.0))
+            middle = mean + close_shift
+            if middle:
+                values['bb_width'] = 2 * self.bb_std * std / middle * 100
+        if n > atr_p:
+            values['atr'] = atr
+            if close[-1]:
+                values['atr_pct'] = atr / close[-1] * 100
+        if n >= vol_p:
+            mean = vol_sum / vol_p
+            std = math.sqrt(max(vol_sumsq / vol_p - mean * mean, 0.0))
+            values['volume_zscore'] = (volume[-1] - volume_shift - mean) / std if std > 0 else 0.0
+        if n:
+            values['obv'] = obv
+            values['prev_obv'] = prev_obv
+
+        # Every field is written, so a reused record never keeps values from a previous series
+        for field in INDICATOR_FIELDS:
+            out[field] = values[field]
+        return out
@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import numpy as np
+
+# Crypto-tuned lexicon on the VADER scale (-4 very negative .. +4 very positive)
+CRYPTO_LEXICON = {
+    # Bullish
+    'moon': 2.5, 'mooning': 2.8, 'bullish': 2.5, 'bull': 1.5, 'bullrun': 2.5, 'pump': 1.5, 'pumping': 1.8,
+    'breakout': 2.0, 'rally': 2.0, 'rallying': 2.0, 'surge': 2.0, 'surging': 2.0, 'soar': 2.2, 'soaring': 2.2,
+    'gem': 2.0, 'undervalued': 1.8, 'ath': 1.5, 'gains': 1.8, 'gain': 1.5, 'profit': 1.8, 'profits': 1.8,
+    'green': 1.2, 'rocket': 2.0, 'hodl': 1.0, 'buy': 1.0, 'buying': 1.0, 'accumulate': 1.2, 'accumulating': 1.2,
+    'adoption': 1.5, 'partnership': 1.5, 'upgrade': 1.2, 'approval': 1.5, 'approved': 1.8, 'strong': 1.5,
+    'recovery': 1.5, 'recovering': 1.5, 'win': 1.5, 'winning': 1.8, 'lfg': 2.0, 'wagmi': 2.0, 'long': 0.8,
+    'up': 0.5, 'higher': 0.8, 'support': 0.8, 'great': 2.0, 'good': 1.5, 'huge': 1.2, 'love': 2.0, 'best': 2.0,
+    '\U0001F680': 2.5, '\U0001F4C8': 1.8, '\U0001F48E': 1.5, '\U0001F525': 1.5,
+    # Bearish
+    'dump': -2.0, 'dumping': -2.2, 'dumped': -2.0, 'crash': -2.8, 'crashing': -2.8, 'crashed': -2.8,
+    'bearish': -2.5, 'bear': -1.5, 'rug': -3.0, 'rugpull': -3.2, 'rugged': -3.0, 'scam': -3.2, 'scammer': -3.0,
+    'fraud': -3.2, 'ponzi': -3.0, 'hack': -2.8, 'hacked': -3.0, 'exploit': -2.5, 'exploited': -2.8,
+    'sell': -1.0, 'selling': -1.2, 'fud': -1.5, 'rekt': -2.5, 'liquidated': -2.5, 'liquidation': -2.0,
+    'loss': -1.8, 'losses': -2.0, 'red': -1.2, 'down': -0.8, 'lower': -0.8, 'drop': -1.5, 'dropping': -1.6,
+    'plunge': -2.5, 'plunging': -2.5, 'plummet': -2.8, 'tank': -2.0, 'tanking': -2.2, 'overvalued': -1.5,
+    'bubble': -1.5, 'dead': -2.5, 'delist': -2.5, 'delisted': -2.5, 'delisting': -2.5, 'lawsuit': -2.0,
+    'ban': -2.0, 'banned': -2.2, 'warning': -1.5, 'risky': -1.2, 'weak': -1.5, 'ngmi': -2.0,
+    'capitulation': -2.5, 'bagholder': -1.5, 'bagholders': -1.5, 'short': -0.8, 'bad': -2.0, 'worst': -2.5,
+    'fear': -1.8, 'panic': -2.2,
+    '\U0001F4C9': -1.8, '\U0001F480': -2.0, '\U0001F921': -1.5,
+}
+
+NEGATIONS = {
+    'not', 'no', 'never', 'nobody', 'none', 'nor', 'neither', 'without',
+    "isn't", 'isnt', "aren't", 'arent', "wasn't", 'wasnt', "don't", 'dont', "doesn't", 'doesnt',
+    "didn't", 'didnt', "won't", 'wont', "can't", 'cant', "ain't", 'aint',
+}
+
+TOKEN_PATTERN = re.compile("[a-z0-9']+|[\U0001F300-\U0001FAFF]")
+
+
+class SentimentScorer:
+    """
+    Lexicon-based sentiment for batches of short texts (Reddit titles).
+
+    All titles are tokenized into one sparse token-count matrix held as CSR-style
+    NumPy arrays (one vocabulary id per token occurrence plus the row it belongs to),
+    so scoring is a lexicon lookup, a negation mask and one bincount per batch.
+    Token scores are flipped and damped when one of the three preceding tokens is a
+    negation, and each text's sum is squashed into [-1, 1] like VADER's compound score.
+    """
+
+    NEGATION_WINDOW = 3
+    NEGATION_SCALAR = -0.74
+    NORMALIZATION_ALPHA = 15
+
+    def __init__(self, lexicon=None):
+        self.lexicon = dict(CRYPTO_LEXICON if lexicon is None else lexicon)
+        # Optional JSON file of {"term": weight} overrides/additions
+        lexicon_path = os.getenv('SENTIMENT_LEXICON_PATH')
+        if lexicon is None and lexicon_path:
+            try:
+                with open(lexicon_path, 'r') as f:
+                    self.lexicon.update({term.lower(): float(weight) for term, weight in json.load(f).items()})
+            except Exception as e:
+                print(f"Error loading sentiment lexicon from {lexicon_path}: {e}. Using the built-in lexicon.")
+
+        # Vocabulary: 0 = any other token, then lexicon terms, then negations
+        terms = sorted(self.lexicon)
+        self.vocabulary = {term: i + 1 for i, term in enumerate(terms)}
+        for word in sorted(NEGATIONS - set(terms)):
+            self.vocabulary[word] = len(self.vocabulary) + 1
+        self.weights = np.zeros(len(self.vocabulary) + 1)
+        self.weights[1:len(terms) + 1] = [self.lexicon[term] for term in terms]
+        self.is_negation = np.zeros(len(self.vocabulary) + 1, dtype=bool)
+        self.is_negation[[self.vocabulary[word] for word in NEGATIONS]] = True
+
+    def token_matrix(self, texts):
+        """
+        Tokenize texts into CSR-style arrays: (token_ids, row_ids, indptr).
+        token_ids[indptr[i]:indptr[i + 1]] are the vocabulary ids of text i, in order.
+        """
+        vocabulary = self.vocabulary
+        tokenized = [TOKEN_PATTERN.findall(text.lower()) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=len(tokenized))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        token_ids = np.fromiter((vocabulary.get(token, 0) for tokens in tokenized for token in tokens),
+                                dtype=np.int32, count=int(indptr[-1]))
+        row_ids = np.repeat(np.arange(len(tokenized)), lengths)
+        return token_ids, row_ids, indptr
+
+    def score(self, texts):
+        """Compound sentiment in [-1, 1] for every text (0 when no lexicon term appears)."""
+        if not len(texts):
+            return np.zeros(0)
+        token_ids, row_ids, _ = self.token_matrix(texts)
+        token_scores = self.weights[token_ids]
+
+        # Flip tokens preceded by a negation within the window (and within the same text)
+        negated = np.zeros(len(token_ids), dtype=bool)
+        negation = self.is_negation[token_ids]
+        for k in range(1, self.NEGATION_WINDOW + 1):
+            negated[k:] |= negation[:-k] & (row_ids[:-k] == row_ids[k:])
+        token_scores = np.where(negated, token_scores * self.NEGATION_SCALAR, token_scores)
+
+        totals = np.bincount(row_ids, weights=token_scores, minlength=len(texts))
+        return totals / np.sqrt(totals * totals + self.NORMALIZATION_ALPHA)
+
+    @staticmethod
+    def aggregate(scores, text_index, group_index, n_groups):
+        """
+        Mean score per group from (text, group) pairs, e.g. post-mentions-symbol matches.
+        Groups without any text get NaN.
+        """
+        text_index = np.asarray(text_index, dtype=np.int64)
+        group_index = np.asarray(group_index, dtype=np.int64)
+        counts = np.bincount(group_index, minlength=n_groups)
+        totals = np.bincount(group_index, weights=scores[text_index], minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
@@ -1,6 +1,7 @@
 import os
 import time
 from pycoingecko import CoinGeckoAPI
+from app.monitoring.metrics import metrics
 
 class CoinGeckoCollector:
     def __init__(self):
@@ -10,23 +11,30 @@ class CoinGeckoCollector:
     def get_trending_coins(self):
         """Fetch trending coins from CoinGecko"""
         try:
-            trending = self.cg.get_search_trending()
+            metrics.count('coingecko.requests')
+            with metrics.span('coingecko.trending'):
+                trending = self.cg.get_search_trending()
+            metrics.count('coingecko.bytes', metrics.payload_bytes(trending))
             return [coin['item'] for coin in trending['coins']]
         except Exception as e:
+            metrics.count('coingecko.errors')
             print(f"Error fetching trending coins: {e}")
             return []
     
     def get_market_data(self):
         """Fetch market data for top coins by market cap"""
         try:
-            market_data = self.cg.get_coins_markets(
-                vs_currency='usd',
-                order='market_cap_desc',
-                per_page=self.top_coins_limit,
-                page=1,
-                sparkline=False,
-                price_change_percentage='24h,7d'
-            )
+            metrics.count('coingecko.requests')
+            with metrics.span('coingecko.market_data'):
+                market_data = self.cg.get_coins_markets(
+                    vs_currency='usd',
+                    order='market_cap_desc',
+                    per_page=self.top_coins_limit,
+                    page=1,
+                    sparkline=False,
+                    price_change_percentage='24h,7d'
+                )
+            metrics.count('coingecko.bytes', metrics.payload_bytes(market_data))
             
             # Add a small delay to avoid API rate limiting
             time.sleep(0.5)
@@ -35,6 +43,7 @@ class CoinGeckoCollector:
             
             return market_data
         except Exception as e:
+            metrics.count('coingecko.errors')
             print(f"Error fetching market data: {e}")
             return []
     
@@ -1,13 +1,29 @@
 import os
+import math
 import time
-import pandas as pd
-import pandas_ta as ta
 from datetime import datetime, timedelta
-from kucoin.client import Market
+from app.monitoring.metrics import metrics
+from app.state.indicator_snapshot import IndicatorSnapshotStore
+from app.state.scan_checkpoint import ScanCheckpoint
+
+# Candles requested per timeframe, plus the MACD slow-period buffer _get_ohlc keeps on top:
+# the indicators (and the RSI alerts) are computed over the last OHLC_BARS candles
+OHLC_LIMIT = 50
+MACD_BUFFER = 26
+OHLC_BARS = OHLC_LIMIT + MACD_BUFFER
+
+def _pandas():
+    """Import pandas on first use (it is slow to import)."""
+    import pandas as pd
+    return pd
 
 class KuCoinCollector:
-    def __init__(self, enabled=None):
-        """Initialize KuCoin client and settings."""
+    def __init__(self, enabled=None, checkpoint_scope='kucoin'):
+        """
+        Initialize KuCoin client and settings.
+        checkpoint_scope names the scan in the checkpoint file, so an interrupted
+        scan resumes only from checkpoints of the same kind of scan.
+        """
         self.api_key = os.getenv('KUCOIN_API_KEY')
         self.api_secret = os.getenv('KUCOIN_API_SECRET')
         self.api_passphrase = os.getenv('KUCOIN_API_PASSPHRASE')
@@ -15,15 +31,89 @@ class KuCoinCollector:
             self.enabled = os.getenv('ENABLE_KUCOIN_TA', 'false').lower() == 'true'
         else:
             self.enabled = enabled
+        # Pause after each KuCoin request (basic rate limiting)
+        self.request_delay = float(os.getenv('KUCOIN_REQUEST_DELAY', '0.2'))
 
+        # Market client is created on first use
+        self._client = None
+        # Indicator kernel and its output records are created on first use
+        self._kernel = None
+        self._records = None
+        # Latest indicators are also kept in a snapshot store for quick queries ('' disables)
+        self.snapshot_path = os.getenv('INDICATOR_SNAPSHOT_PATH', '.state/indicator_snapshots.sqlite')
+        self._snapshots = None
+        # Completed symbols are checkpointed so an interrupted scan can resume ('' disables)
+        self.checkpoint_path = os.getenv('SCAN_CHECKPOINT_PATH', '.state/scan_checkpoints.sqlite')
+        self.checkpoint_scope = checkpoint_scope
+        self._checkpoints = None
         if self.enabled:
-            # Initialize Market client (doesn't require authentication for public endpoints)
-            self.client = Market(url='https://api.kucoin.com') # Use Market for public data
-            print("  - KuCoin TA enabled. Market client initialized.")
+            print("  - KuCoin TA enabled.")
         else:
-            self.client = None
             print("  - KuCoin TA disabled.")
 
+    @property
+    def client(self):
+        """KuCoin Market client, or None when TA is disabled."""
+        if self.enabled and self._client is None:
+            from kucoin.client import Market
+            # Initialize Market client (doesn't require authentication for public endpoints)
+            self._client = Market(url='https://api.kucoin.com') # Use Market for public data
+            print("  - KuCoin Market client initialized.")
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    @property
+    def snapshots(self):
+        """IndicatorSnapshotStore the collected indicators are written to, or None when disabled."""
+        if self.snapshot_path and self._snapshots is None:
+            self._snapshots = IndicatorSnapshotStore(path=self.snapshot_path)
+        return self._snapshots
+
+    @property
+    def checkpoints(self):
+        """ScanCheckpoint completed symbols are recorded in, or None when disabled."""
+        if self.checkpoint_path and self._checkpoints is None:
+            self._checkpoints = ScanCheckpoint(path=self.checkpoint_path)
+        return self._checkpoints
+
+    def _load_checkpoint(self, coin_symbols):
+        try:
+            if self.checkpoints is not None:
+                return self.checkpoints.load(self.checkpoint_scope, coin_symbols)
+        except Exception as e:
+            print(f"  - Error reading scan checkpoints, scanning from the start: {e}")
+        return {}
+
+    def _save_checkpoint(self, symbol, values):
+        try:
+            if self.checkpoints is not None:
+                self.checkpoints.save(self.checkpoint_scope, symbol, values)
+        except Exception as e:
+            print(f"      - Error saving scan checkpoint for {symbol}: {e}")
+
+    def _save_snapshot(self, symbol, values):
+        try:
+            if self.snapshots is not None:
+                self.snapshots.upsert({symbol: values})
+        except Exception as e:
+            print(f"      - Error saving indicator snapshot for {symbol}: {e}")
+
+    def forget(self, symbols):
+        """
+        Drop this scan's checkpoints and the stored snapshots of symbols, e.g. ones added to
+        or removed from a watchlist, so they are scanned fresh and no longer show up in queries.
+        """
+        try:
+            if self.checkpoints is not None:
+                self.checkpoints.clear(self.checkpoint_scope, symbols)
+            if self.snapshots is not None:
+                self.snapshots.evict(symbols)
+        except Exception as e:
+            print(f"  - Error forgetting {len(symbols)} symbols: {e}")
+
     def _get_ohlc(self, symbol_pair, interval='1day', limit=30):
         """
         Fetch OHLC data for a given symbol pair and interval.
@@ -38,10 +128,14 @@ class KuCoinCollector:
             "3800000"                 //Transaction amount
         ]
         """
+        pd = _pandas()
         try:
             # KuCoin API expects timestamps in seconds
             # Fetch slightly more data to ensure calculations are stable
-            klines = self.client.get_kline(symbol_pair, interval) # Default limit might be large enough
+            metrics.count('kucoin.requests')
+            with metrics.span('kucoin.kline'):
+                klines = self.client.get_kline(symbol_pair, interval) # Default limit might be large enough
+            metrics.count('kucoin.bytes', metrics.payload_bytes(klines))
 
             if not klines:
                 print(f"    - No OHLC data found for {symbol_pair} ({interval})")
@@ -59,143 +153,180 @@ class KuCoinCollector:
             df.set_index('timestamp', inplace=True)
             df = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
 
-            # Sort by timestamp ascending (oldest first) as required by pandas_ta
+            # Sort by timestamp ascending (oldest first) as required by the indicator kernel
             df.sort_index(inplace=True)
 
             # Limit data points after sorting
-            df = df.tail(limit + 26) # Keep enough for MACD calculation buffer (slow period)
+            df = df.tail(limit + MACD_BUFFER) # Keep enough for MACD calculation buffer (slow period)
 
             return df
 
         except Exception as e:
+            metrics.count('kucoin.errors')
             print(f"    - Error fetching KuCoin OHLC for {symbol_pair} ({interval}): {e}")
             # Handle specific KuCoin errors if needed, e.g., invalid symbol
             return None
 
-    def _calculate_rsi(self, df, period=14):
-        """Calculate RSI using pandas_ta."""
-        if df is None or len(df) < period:
-            return None
-        try:
-            # Calculate RSI
-            df.ta.rsi(length=period, append=True)
-            # Return the latest RSI value
-            latest_rsi = df[f'RSI_{period}'].iloc[-1]
-            return round(latest_rsi, 2) if pd.notna(latest_rsi) else None
-        except Exception as e:
-            print(f"    - Error calculating RSI: {e}")
-            return None
+    @property
+    def kernel(self):
+        """IndicatorKernel plus one preallocated record per timeframe, created on first use (imports numpy)."""
+        if self._kernel is None:
+            from app.analysis.indicators import IndicatorKernel
+            self._kernel = IndicatorKernel()
+            self._records = self._kernel.new_record(2)
+        return self._kernel
 
-    def _calculate_macd(self, df, fast=12, slow=26, signal=9):
+    def _calculate_indicators(self, df, slot=0):
         """
-        Calculate MACD using pandas_ta.
-        Returns dict with MACD line, signal line, and histogram values.
+        Compute every indicator for an OHLC DataFrame in one pass of the indicator kernel.
+        The values are written into preallocated record `slot` (0 daily, 1 weekly), which is returned.
         """
-        if df is None or len(df) < slow:
+        if df is None or df.empty:
             return None
         try:
-            # Calculate MACD
-            df.ta.macd(fast=fast, slow=slow, signal=signal, append=True)
-
-            # Calculate histogram trend (compare current to previous)
-            if len(df) >= 2:
-                prev_histogram = df[f'MACDh_{fast}_{slow}_{signal}'].iloc[-2]
-                curr_histogram = df[f'MACDh_{fast}_{slow}_{signal}'].iloc[-1]
-                histogram_percentage_diff = (curr_histogram - prev_histogram) / prev_histogram * 100
-                
-                if pd.notna(prev_histogram) and pd.notna(curr_histogram):
-                    if curr_histogram > prev_histogram:
-                        histogram_trend = "increasing"
-                    elif curr_histogram < prev_histogram:
-                        histogram_trend = "decreasing"
-                    else:
-                        histogram_trend = "flat"
-                else:
-                    histogram_trend = None
-            else:
-                histogram_trend = None
-            
-            # Get the latest values
-            macd_line = df[f'MACD_{fast}_{slow}_{signal}'].iloc[-1]
-            macd_histogram = df[f'MACDh_{fast}_{slow}_{signal}'].iloc[-1]
-            macd_signal = df[f'MACDs_{fast}_{slow}_{signal}'].iloc[-1]
-            
-            # Return values if they exist
-            if pd.notna(macd_line) and pd.notna(macd_histogram) and pd.notna(macd_signal):
-                return {
-                    'macd_line': round(macd_line, 6),
-                    'macd_signal': round(macd_signal, 6),
-                    'macd_histogram': round(macd_histogram, 6),
-                    'histogram_trend': histogram_trend,
-                    'histogram_percentage_diff': round(histogram_percentage_diff, 2)
-                }
-            return None
+            kernel = self.kernel
+            return kernel.compute(df['open'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(),
+                                  df['close'].to_numpy(), df['volume'].to_numpy(), out=self._records[slot])
         except Exception as e:
-            print(f"    - Error calculating MACD: {e}")
+            print(f"    - Error calculating indicators: {e}")
             return None
 
+    @staticmethod
+    def _value(record, field, digits):
+        """A record field rounded to `digits`, or None when it could not be computed."""
+        if record is None:
+            return None
+        value = float(record[field])
+        return round(value, digits) if math.isfinite(value) else None
+
+    def _rsi_value(self, record):
+        return self._value(record, 'rsi', 2)
+
+    def _macd_values(self, record):
+        """Dict with MACD line, signal line and histogram values (and the histogram's trend), or None."""
+        macd_line = self._value(record, 'macd_line', 6)
+        macd_signal = self._value(record, 'macd_signal', 6)
+        macd_histogram = self._value(record, 'macd_histogram', 6)
+        if macd_line is None or macd_signal is None or macd_histogram is None:
+            return None
+
+        # Compare the histogram to the previous bar's
+        curr_histogram = float(record['macd_histogram'])
+        prev_histogram = float(record['prev_macd_histogram'])
+        histogram_trend = None
+        histogram_percentage_diff = None
+        if math.isfinite(prev_histogram):
+            if curr_histogram > prev_histogram:
+                histogram_trend = "increasing"
+            elif curr_histogram < prev_histogram:
+                histogram_trend = "decreasing"
+            else:
+                histogram_trend = "flat"
+            if prev_histogram != 0:
+                histogram_percentage_diff = round((curr_histogram - prev_histogram) / prev_histogram * 100, 2)
+
+        return {
+            'macd_line': macd_line,
+            'macd_signal': macd_signal,
+            'macd_histogram': macd_histogram,
+            'histogram_trend': histogram_trend,
+            'histogram_percentage_diff': histogram_percentage_diff
+        }
+
+    def _extra_indicators(self, record, suffix):
+        """Bollinger width (%), ATR (% of price), volume z-score and OBV trend, keyed with the timeframe suffix."""
+        obv_trend = None
+        if record is not None and math.isfinite(record['prev_obv']):
+            obv, prev_obv = float(record['obv']), float(record['prev_obv'])
+            obv_trend = "rising" if obv > prev_obv else "falling" if obv < prev_obv else "flat"
+        return {
+            f'bb_width_{suffix}': self._value(record, 'bb_width', 2),
+            f'atr_pct_{suffix}': self._value(record, 'atr_pct', 2),
+            f'volume_zscore_{suffix}': self._value(record, 'volume_zscore', 2),
+            f'obv_trend_{suffix}': obv_trend,
+        }
+
     def collect(self, coin_symbols):
         """
-        Fetch OHLC data and calculate RSI for a list of coin symbols.
-        Returns a dictionary: {'SYMBOL': {'rsi_1d': value, 'rsi_7d': value}, ...}
+        Fetch OHLC data and calculate indicators for a list of coin symbols.
+        Returns a dictionary: {'SYMBOL': {'rsi_1d': value, 'rsi_7d': value, 'macd_1d': {...}, 'macd_1w': {...},
+        'bb_width_1d', 'atr_pct_1d', 'volume_zscore_1d', 'obv_trend_1d' (and the same with _1w)}, ...}
         """
         if not self.enabled or not self.client:
             return {}
 
-        results = {}
-        print("  - Fetching KuCoin TA data...")
+        with metrics.span('kucoin.collect'):
+            results = {}
+            print("  - Fetching KuCoin TA data...")
 
-        # Assume USDT pairing for simplicity. This might need refinement.
-        # Consider adding error handling or logic for different base pairs if needed.
+            # Resume an interrupted scan: reuse symbols completed within the checkpoint window
+            completed = self._load_checkpoint(coin_symbols)
+            if completed:
+                print(f"  - Resuming scan: {len(completed)} of {len(coin_symbols)} symbols already checkpointed.")
 
-        for symbol in coin_symbols:
-            symbol_pair = f"{symbol.upper()}-USDT"
-            print(f"    - Processing {symbol_pair}...")
-            results[symbol] = {'rsi_1d': None, 'rsi_7d': None}
+            # Assume USDT pairing for simplicity. This might need refinement.
+            # Consider adding error handling or logic for different base pairs if needed.
 
-            # --- Daily RSI ---
-            # Fetch ~50 days of data for 14-day RSI
-            df_1d = self._get_ohlc(symbol_pair, interval='1day', limit=50)
-            if df_1d is not None:
-                rsi_1d = self._calculate_rsi(df_1d, period=14)
-                results[symbol]['rsi_1d'] = rsi_1d
-                # print(f"      - Daily RSI: {rsi_1d}")
+            for symbol in coin_symbols:
+                if symbol in completed:
+                    metrics.count('kucoin.resumed')
+                    if completed[symbol] is not None:
+                        results[symbol] = completed[symbol]
+                    continue
+                symbol_pair = f"{symbol.upper()}-USDT"
+                print(f"    - Processing {symbol_pair}...")
+                metrics.count('kucoin.symbols')
+                results[symbol] = {'rsi_1d': None, 'rsi_7d': None}
 
-                macd_1d = self._calculate_macd(df_1d)
-                results[symbol]['macd_1d'] = macd_1d
-                # print(f"      - Daily MACD: {macd_1d}")
-            else:
-                 print(f"      - Could not fetch daily data or calculate RSI.")
-            time.sleep(0.2)  # Basic rate limiting
-
-            # --- Weekly RSI ---
-            # Fetch ~50 weeks of data for 14-week RSI
-            df_1w = self._get_ohlc(symbol_pair, interval='1week', limit=50)
-            if df_1w is not None:
-                rsi_7d = self._calculate_rsi(df_1w, period=14)
-                results[symbol]['rsi_7d'] = rsi_7d
-                # print(f"      - Weekly RSI: {rsi_7d}")
-
-                macd_1w = self._calculate_macd(df_1w)
-                results[symbol]['macd_1w'] = macd_1w
-                # print(f"      - Weekly MACD: {macd_1w}")
-            else:
-                print(f"      - Could not fetch weekly data or calculate RSI.")
-            time.sleep(0.2)  # Basic rate limiting
-
-            # Filter out symbols exceeding thresholds
-            if ((results[symbol]['rsi_1d'] is None)
-                or (results[symbol]['rsi_7d'] is None)):
-                print(f"      - Filtering out {symbol} (1d: {results[symbol]['rsi_1d']}, 7d: {results[symbol]['rsi_7d']})")
-                del results[symbol]
-            else:
-                print(f"      - {symbol}")
-                print(f"        - {results[symbol]}")
+                # --- Daily indicators ---
+                # Fetch ~50 days of data for 14-day RSI
+                df_1d = self._get_ohlc(symbol_pair, interval='1day', limit=OHLC_LIMIT)
+                if df_1d is not None:
+                    record = self._calculate_indicators(df_1d, slot=0)
+                    results[symbol]['rsi_1d'] = self._rsi_value(record)
+                    results[symbol]['macd_1d'] = self._macd_values(record)
+                    results[symbol].update(self._extra_indicators(record, '1d'))
+                else:
+                     print(f"      - Could not fetch daily data or calculate RSI.")
+                time.sleep(self.request_delay)  # Basic rate limiting
+
+                # --- Weekly indicators ---
+                # Fetch ~50 weeks of data for 14-week RSI
+                df_1w = self._get_ohlc(symbol_pair, interval='1week', limit=OHLC_LIMIT)
+                if df_1w is not None:
+                    record = self._calculate_indicators(df_1w, slot=1)
+                    results[symbol]['rsi_7d'] = self._rsi_value(record)
+                    results[symbol]['macd_1w'] = self._macd_values(record)
+                    results[symbol].update(self._extra_indicators(record, '1w'))
+                else:
+                    print(f"      - Could not fetch weekly data or calculate RSI.")
+                time.sleep(self.request_delay)  # Basic rate limiting
+
+                # Filter out symbols exceeding thresholds
+                if ((results[symbol]['rsi_1d'] is None)
+                    or (results[symbol]['rsi_7d'] is None)):
+                    print(f"      - Filtering out {symbol} (1d: {results[symbol]['rsi_1d']}, 7d: {results[symbol]['rsi_7d']})")
+                    del results[symbol]
+                    # Retry on resume if a request failed; otherwise the symbol is done
+                    if df_1d is not None and df_1w is not None:
+                        self._save_checkpoint(symbol, None)
+                else:
+                    print(f"      - {symbol}")
+                    print(f"        - {results[symbol]}")
+                    self._save_snapshot(symbol, results[symbol])
+                    self._save_checkpoint(symbol, results[symbol])
+
+                print("--------------------------------")
 
-            print("--------------------------------")
+            # The scan finished, so the next one starts fresh
+            try:
+                if self.checkpoints is not None:
+                    self.checkpoints.clear(self.checkpoint_scope, coin_symbols)
+            except Exception as e:
+                print(f"  - Error clearing scan checkpoints: {e}")
 
-        print("  ✓ KuCoin TA data collection complete.")
-        return results 
+            print("  ✓ KuCoin TA data collection complete.")
+            return results 
     
 if __name__ == "__main__":
     kucoin = KuCoinCollector(enabled=True)
@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import socket
+import secrets
+import sqlite3
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from app.collectors.kucoin_collector import KuCoinCollector
+from app.monitoring.metrics import metrics
+
+
+def partition(symbols, shards):
+    """Split symbols into `shards` round-robin lists (empty lists are dropped)."""
+    shards = max(1, shards)
+    return [part for part in (symbols[i::shards] for i in range(shards)) if part]
+
+
+def _scan_shard(symbols, request_delay, checkpoint_scope='kucoin'):
+    """
+    Worker process entry point: scan one shard with its share of the rate limit.
+    Returns (results, counters) so the parent can add the worker's request counts to its metrics.
+    """
+    # Forked workers inherit the parent's counters; start from zero so they are not counted twice
+    metrics.reset()
+    collector = KuCoinCollector(enabled=True, checkpoint_scope=checkpoint_scope)
+    collector.request_delay = request_delay
+    return collector.collect(symbols), dict(metrics.counters)
+
+
+def _queue_worker(queue_path, run_id, request_delay):
+    """Worker process entry point: drain a run's shards from the shared queue."""
+    return ShardQueue(queue_path).work(run_id=run_id, request_delay=request_delay)
+
+
+class ShardQueue:
+    """
+    SQLite-backed work queue of symbol shards, shared by every machine that can
+    open the database file (e.g. on a network share).
+    A claimed shard whose worker dies is handed out again after the lease expires.
+    Each finished shard stores the worker's metrics counters next to its result.
+    Rows are deleted once the coordinator has read a run's results; runs abandoned
+    by a crashed coordinator are deleted after SCAN_QUEUE_RETENTION_SECONDS.
+    """
+
+    def __init__(self, path, lease_seconds=None):
+        self.path = path
+        self.lease_seconds = float(lease_seconds or os.getenv('SCAN_LEASE_SECONDS', '600'))
+        self.retention_seconds = float(os.getenv('SCAN_QUEUE_RETENTION_SECONDS', '86400'))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_shards (
+                    run_id TEXT NOT NULL,
+                    shard INTEGER NOT NULL,
+                    symbols TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker TEXT,
+                    claimed_at REAL,
+                    result TEXT,
+                    counters TEXT,
+                    published_at REAL,
+                    PRIMARY KEY (run_id, shard)
+                )
+            """)
+            # Queue files created before counters/published_at were added
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_shards)")}
+            for column, kind in (('counters', 'TEXT'), ('published_at', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE scan_shards ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_shards_status ON scan_shards (status, run_id)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def publish(self, run_id, symbols, shard_size):
+        """Split symbols into shards of `shard_size` and add them to the queue. Returns the shard count."""
+        shards = [symbols[i:i + shard_size] for i in range(0, len(symbols), shard_size)]
+        now = time.time()
+        with self._connect() as conn:
+            # Runs left behind by coordinators that never collected them
+            conn.execute(
+                "DELETE FROM scan_shards WHERE run_id IN "
+                "(SELECT run_id FROM scan_shards GROUP BY run_id HAVING MAX(COALESCE(published_at, 0)) < ?)",
+                (now - self.retention_seconds,)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO scan_shards (run_id, shard, symbols, published_at) VALUES (?, ?, ?, ?)",
+                [(run_id, i, json.dumps(shard), now) for i, shard in enumerate(shards)]
+            )
+        return len(shards)
+
+    def claim(self, run_id=None):
+        """Atomically claim the next pending (or lease-expired) shard. Returns (run_id, shard, symbols) or None."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = time.time() - self.lease_seconds
+            query = ("SELECT run_id, shard, symbols FROM scan_shards "
+                     "WHERE (status = 'pending' OR (status = 'claimed' AND claimed_at < ?))")
+            params = [expired]
+            if run_id is not None:
+                query += " AND run_id = ?"
+                params.append(run_id)
+            row = conn.execute(query + " ORDER BY run_id, shard LIMIT 1", params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE scan_shards SET status = 'claimed', worker = ?, claimed_at = ? WHERE run_id = ? AND shard = ?",
+                (self.worker_id, time.time(), row[0], row[1])
+            )
+            conn.execute("COMMIT")
+            return row[0], row[1], json.loads(row[2])
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, run_id, shard, result, counters=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE scan_shards SET status = 'done', result = ?, counters = ?, worker = ? WHERE run_id = ? AND shard = ?",
+                (json.dumps(result), json.dumps(counters or {}), self.worker_id, run_id, shard)
+            )
+
+    def work(self, run_id=None, request_delay=None):
+        """Claim and scan shards until none are left. Returns the number of shards processed."""
+        collector = None
+        processed = 0
+        while True:
+            claimed = self.claim(run_id)
+            if claimed is None:
+                return processed
+            if collector is None:
+                collector = KuCoinCollector(enabled=True)
+                if request_delay is not None:
+                    collector.request_delay = request_delay
+            shard_run_id, shard, symbols = claimed
+            # A shard re-claimed after its worker died resumes from that worker's checkpoints on this machine
+            collector.checkpoint_scope = f"queue:{shard_run_id}"
+            print(f"  - [{self.worker_id}] Scanning shard {shard} of run {shard_run_id} ({len(symbols)} symbols)")
+            before = dict(metrics.counters)
+            result = collector.collect(symbols)
+            counters = {name: value - before.get(name, 0) for name, value in metrics.counters.items()
+                        if value != before.get(name, 0)}
+            self.complete(shard_run_id, shard, result, counters)
+            processed += 1
+
+    def progress(self, run_id):
+        """Return (done, total) shard counts for a run."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(status = 'done'), 0), COUNT(*) FROM scan_shards WHERE run_id = ?", (run_id,)
+            ).fetchone()
+
+    def results(self, run_id):
+        """Merge the results of every finished shard of a run."""
+        merged = {}
+        with self._connect() as conn:
+            for (result,) in conn.execute(
+                "SELECT result FROM scan_shards WHERE run_id = ? AND status = 'done' ORDER BY shard", (run_id,)
+            ):
+                merged.update(json.loads(result))
+        return merged
+
+    def counters(self, run_id, exclude_worker=None):
+        """Sum the metrics counters of a run's finished shards, leaving out those scanned by `exclude_worker`."""
+        totals = {}
+        with self._connect() as conn:
+            for worker, counters in conn.execute(
+                "SELECT worker, counters FROM scan_shards WHERE run_id = ? AND status = 'done'", (run_id,)
+            ):
+                if worker == exclude_worker or not counters:
+                    continue
+                for name, value in json.loads(counters).items():
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def purge(self, run_id):
+        """Delete a run's shards once its results have been collected."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scan_shards WHERE run_id = ?", (run_id,))
+
+
+class ShardedKuCoinScanner:
+    """
+    Runs KuCoinCollector.collect over a watchlist split across worker processes.
+    With SCAN_QUEUE_PATH set, shards go through a ShardQueue so workers on other
+    machines (`python -m app.collectors.sharded_scan worker --queue PATH`) can help.
+    """
+
+    def __init__(self, workers=None, queue_path=None, checkpoint_scope='kucoin'):
+        self.enabled = os.getenv('ENABLE_KUCOIN_TA', 'false').lower() == 'true'
+        self.checkpoint_scope = checkpoint_scope
+        self.workers = int(workers or os.getenv('SCAN_WORKERS', '1'))
+        self.queue_path = queue_path or os.getenv('SCAN_QUEUE_PATH')
+        self.shard_size = int(os.getenv('SCAN_SHARD_SIZE', '25'))
+        self.queue_timeout = float(os.getenv('SCAN_QUEUE_TIMEOUT', '3600'))
+        # Combined KuCoin request budget shared by the local worker processes
+        self.max_requests_per_second = float(os.getenv('KUCOIN_MAX_REQUESTS_PER_SECOND', '10'))
+        self.request_delay = float(os.getenv('KUCOIN_REQUEST_DELAY', '0.2'))
+
+    def _worker_delay(self):
+        """Per-process pause so all local workers together stay under the request budget."""
+        return max(self.request_delay, self.workers / self.max_requests_per_second)
+
+    @property
+    def sharded(self):
+        """True when the scan should use worker processes or the shared queue."""
+        return self.workers > 1 or bool(self.queue_path)
+
+    def collect(self, symbols):
+        """Scan symbols and return the merged {'SYMBOL': {...}} results, like KuCoinCollector.collect."""
+        if not self.enabled:
+            return {}
+        if self.queue_path:
+            return self._collect_via_queue(symbols)
+        if self.workers <= 1 or len(symbols) <= 1:
+            return KuCoinCollector(enabled=True, checkpoint_scope=self.checkpoint_scope).collect(symbols)
+
+        shards = partition(symbols, self.workers)
+        print(f"  - Scanning {len(symbols)} symbols in {len(shards)} worker processes...")
+        results = {}
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [executor.submit(_scan_shard, shard, self._worker_delay(), self.checkpoint_scope) for shard in shards]
+            for future in futures:
+                try:
+                    shard_results, counters = future.result()
+                    results.update(shard_results)
+                    metrics.merge(counters)
+                except Exception as e:
+                    print(f"  ❌ KuCoin scan shard failed: {e}")
+        return results
+
+    def _collect_via_queue(self, symbols):
+        queue = ShardQueue(self.queue_path)
+        # The pid and random suffix keep coordinators started in the same second from merging into one run
+        run_id = os.getenv('SCAN_RUN_ID') or f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{secrets.token_hex(2)}"
+        total = queue.publish(run_id, symbols, self.shard_size)
+        print(f"  - Published {total} shards for run {run_id} to {self.queue_path}")
+
+        # Work on the run locally too, then wait for shards claimed by other machines
+        with ProcessPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            futures = [executor.submit(_queue_worker, self.queue_path, run_id, self._worker_delay())
+                       for _ in range(max(1, self.workers))]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"  ❌ KuCoin queue worker failed: {e}")
+
+        deadline = time.time() + self.queue_timeout
+        done, total = queue.progress(run_id)
+        while done < total and time.time() < deadline:
+            # Pick up shards whose remote worker died once their lease expires
+            # Other machines may still be scanning, so stay within the shared per-worker budget
+            queue.work(run_id=run_id, request_delay=self._worker_delay())
+            time.sleep(5)
+            done, total = queue.progress(run_id)
+        if done < total:
+            print(f"  ⚠️ Only {done}/{total} shards finished before the timeout; alerting on partial results.")
+        results = queue.results(run_id)
+        # Shards scanned in this process are already in metrics
+        metrics.merge(queue.counters(run_id, exclude_worker=queue.worker_id))
+        queue.purge(run_id)
+        return results
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Work on KuCoin scan shards from a shared queue.")
+    parser.add_argument('command', choices=['worker'])
+    parser.add_argument('--queue', default=os.getenv('SCAN_QUEUE_PATH'), required=os.getenv('SCAN_QUEUE_PATH') is None)
+    parser.add_argument('--run-id', default=None, help="Only work on this run (default: any run with pending shards)")
+    parser.add_argument('--poll', type=float, default=0, help="Keep polling every N seconds instead of exiting when idle")
+    args = parser.parse_args()
+
+    queue = ShardQueue(args.queue)
+    while True:
+        processed = queue.work(run_id=args.run_id)
+        print(f"Processed {processed} shards.")
+        if args.poll <= 0:
+            break
+        time.sleep(args.poll)
@@ -1,37 +1,48 @@
 import os
-import praw
 import time
 import ssl
-import requests
 from datetime import datetime, timedelta
-import urllib3
+from app.monitoring.metrics import metrics
 
 class SocialMediaCollector:
     def __init__(self):
-        # Initialize Reddit client if credentials are available
-        try:
-            self.reddit = praw.Reddit(
-                client_id=os.getenv('REDDIT_CLIENT_ID'),
-                client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-                user_agent="CryptoTrendyApp/1.0"
-            )
-            self.reddit_enabled = True
-        except:
-            self.reddit_enabled = False
+        # Reddit client (and praw) are only loaded on first use, if credentials are available
+        self._reddit = None
+        # Lexicon sentiment scorer (and numpy) are only loaded when there are posts to score
+        self._sentiment_scorer = None
+        self.reddit_enabled = bool(os.getenv('REDDIT_CLIENT_ID') and os.getenv('REDDIT_CLIENT_SECRET'))
+        if not self.reddit_enabled:
             print("Reddit API credentials not found or invalid, Reddit collection disabled")
             
         # Disable SSL certificate verification if in development mode
         self.dev_mode = os.getenv('DEVELOPMENT_MODE', 'false').lower() == 'true'
         if self.dev_mode:
+            import urllib3
             # Disable SSL verification warnings
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
             # Create unverified SSL context
             ssl._create_default_https_context = ssl._create_unverified_context
             print("Development mode: SSL certificate verification disabled")
         
+    @property
+    def reddit(self):
+        """Reddit client, created on first use. Disables Reddit collection if it cannot be created."""
+        if self._reddit is None and self.reddit_enabled:
+            try:
+                import praw
+                self._reddit = praw.Reddit(
+                    client_id=os.getenv('REDDIT_CLIENT_ID'),
+                    client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+                    user_agent="CryptoTrendyApp/1.0"
+                )
+            except Exception:
+                self.reddit_enabled = False
+                print("Reddit API credentials not found or invalid, Reddit collection disabled")
+        return self._reddit
+
     def get_reddit_posts(self, subreddits=['CryptoCurrency', 'CryptoMarkets', 'Altcoin', 'Solana', 'DeFi', 'CryptoMoonShots', 'Cardano'], limit=100):
         """Collect top posts from cryptocurrency subreddits"""
-        if not self.reddit_enabled:
+        if not self.reddit_enabled or self.reddit is None:
             return []
             
         posts = []
@@ -40,39 +51,58 @@ class SocialMediaCollector:
                 subreddit = self.reddit.subreddit(subreddit_name)
                 
                 # Get hot posts
-                for post in subreddit.hot(limit=limit):
-                    posts.append({
-                        'title': post.title,
-                        'score': post.score,
-                        'url': post.url,
-                        'created_utc': post.created_utc,
-                        'num_comments': post.num_comments,
-                        'subreddit': subreddit_name
-                    })
+                metrics.count('reddit.requests')
+                with metrics.span('reddit.subreddit'):
+                    for post in subreddit.hot(limit=limit):
+                        posts.append({
+                            'title': post.title,
+                            'score': post.score,
+                            'url': post.url,
+                            'created_utc': post.created_utc,
+                            'num_comments': post.num_comments,
+                            'subreddit': subreddit_name
+                        })
                     
                 # Add a small delay
                 time.sleep(0.5)
                 
+            metrics.count('reddit.posts', len(posts))
+            metrics.count('reddit.bytes', metrics.payload_bytes(posts))
             if posts:
                 print(f"✓ Successfully collected {len(posts)} Reddit posts from {', '.join(subreddits)}")
             return posts
         except Exception as e:
+            metrics.count('reddit.errors')
             print(f"Error collecting Reddit posts: {e}")
             return []
             
     def extract_coin_mentions(self, posts, coin_symbols):
-        """Extract mentions of specific coins from social media content"""
-        mentions = {symbol: {'reddit_mentions': 0} for symbol in coin_symbols}
+        """
+        Extract mentions of specific coins from social media content.
+        Each symbol gets 'reddit_mentions' and 'social_sentiment', the mean sentiment
+        (-1..1) of the posts mentioning it (None without mentions).
+        """
+        mentions = {symbol: {'reddit_mentions': 0, 'social_sentiment': None} for symbol in coin_symbols}
         
         # Convert symbols to lowercase for case-insensitive matching
         symbols_lower = [s.lower() for s in coin_symbols]
         
-        # Count Reddit mentions
-        for post in posts:
+        # Count Reddit mentions, remembering which post mentioned which symbol
+        matched_posts, matched_symbols = [], []
+        for post_index, post in enumerate(posts):
             title_lower = post['title'].lower()
             for i, symbol in enumerate(symbols_lower):
                 if symbol in title_lower or f"${symbol}" in title_lower:
                     mentions[coin_symbols[i]]['reddit_mentions'] += 1
+                    matched_posts.append(post_index)
+                    matched_symbols.append(i)
+
+        if matched_posts:
+            with metrics.span('social.sentiment'):
+                sentiment = self.score_sentiment(posts, matched_posts, matched_symbols, len(coin_symbols))
+            for i, symbol in enumerate(coin_symbols):
+                if mentions[symbol]['reddit_mentions'] > 0:
+                    mentions[symbol]['social_sentiment'] = round(float(sentiment[i]), 3)
         
         # Count mentions with at least one occurrence
         mentioned_coins = sum(1 for symbol in mentions if mentions[symbol]['reddit_mentions'] > 0)
@@ -98,14 +128,25 @@ class SocialMediaCollector:
                     
         return mentions
         
+    def score_sentiment(self, posts, matched_posts, matched_symbols, n_symbols):
+        """Score every post title in one batch and average the scores per symbol over the posts mentioning it."""
+        if self._sentiment_scorer is None:
+            from app.analysis.sentiment import SentimentScorer
+            self._sentiment_scorer = SentimentScorer()
+        scores = self._sentiment_scorer.score([post['title'] for post in posts])
+        metrics.count('social.posts_scored', len(posts))
+        return self._sentiment_scorer.aggregate(scores, matched_posts, matched_symbols, n_symbols)
+
     def collect(self, coin_symbols):
         """Collect all social media data and extract relevant mentions"""
         if not coin_symbols:
             return {}
             
-        reddit_posts = self.get_reddit_posts()
+        with metrics.span('reddit.posts'):
+            reddit_posts = self.get_reddit_posts()
         
-        mentions = self.extract_coin_mentions(reddit_posts, coin_symbols)
+        with metrics.span('social.extract_mentions'):
+            mentions = self.extract_coin_mentions(reddit_posts, coin_symbols)
         
         result = {
             'reddit_posts': reddit_posts,
@@ -0,0 +1,120 @@
+import os
+import io
+import csv
+import json
+import hashlib
+from datetime import datetime
+from app.monitoring.metrics import metrics
+
+SHEET_CSV_URL = "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
+
+
+def parse_symbols(text, column='symbols'):
+    """Upper-cased, non-empty values of the `column` column (matched case-insensitively) of a CSV."""
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, [])
+    index = next((i for i, name in enumerate(header) if name.strip().lower() == column), None)
+    if index is None:
+        raise ValueError(f"No '{column.capitalize()}' column found in Google Sheet")
+    return [row[index].strip().upper() for row in reader if len(row) > index and row[index].strip()]
+
+
+class WatchlistLoader:
+    """
+    Loads the 'Symbols' column of the watchlist Google Sheet and keeps a local JSON
+    snapshot of it. The sheet is requested with the stored ETag/Last-Modified so an
+    unchanged sheet can answer 304, and the CSV is only parsed when its content hash
+    differs from the snapshot. When the sheet can't be fetched or parsed, the
+    snapshot is used instead, so a Google hiccup doesn't stop the run.
+    """
+
+    def __init__(self, sheet_id=None, snapshot_path=None, timeout=None):
+        self.sheet_id = sheet_id or os.getenv('CURRENT_ASSET_SHEET_ID')
+        self.url = SHEET_CSV_URL.format(sheet_id=self.sheet_id)
+        self.snapshot_path = snapshot_path or os.getenv('WATCHLIST_SNAPSHOT_PATH', '.state/watchlist.json')
+        self.timeout = float(timeout or os.getenv('WATCHLIST_TIMEOUT_SECONDS', '15'))
+
+    def load_snapshot(self):
+        """The stored snapshot, or None if there is none (or it is unreadable or for another sheet)."""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            print(f"Error reading watchlist snapshot from {self.snapshot_path}: {e}. Ignoring it.")
+            return None
+        return snapshot if snapshot.get('sheet_id') == self.sheet_id else None
+
+    def save_snapshot(self, snapshot):
+        """Write the snapshot to disk atomically."""
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _fetch(self, snapshot):
+        """GET the sheet CSV, conditional on the snapshot's validators. Returns the response."""
+        import requests
+        headers = {}
+        if snapshot and snapshot.get('etag'):
+            headers['If-None-Match'] = snapshot['etag']
+        if snapshot and snapshot.get('last_modified'):
+            headers['If-Modified-Since'] = snapshot['last_modified']
+        metrics.count('sheet.requests')
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        metrics.count('sheet.bytes_received', len(response.content))
+        return response
+
+    def load(self):
+        """
+        Return {'symbols': [...], 'added': [...], 'removed': [...], 'source': ...} where
+        source is 'sheet' (parsed a changed sheet), 'unchanged' (sheet matches the snapshot)
+        or 'snapshot' (the sheet could not be loaded). added/removed are relative to the
+        snapshot; with no snapshot every symbol counts as added.
+        Returns None when there is neither a usable sheet nor a snapshot.
+        """
+        snapshot = self.load_snapshot()
+        previous = snapshot['symbols'] if snapshot else []
+        try:
+            response = self._fetch(snapshot)
+            if response.status_code == 304 and snapshot:
+                metrics.count('sheet.not_modified')
+                return {'symbols': previous, 'added': [], 'removed': [], 'source': 'unchanged'}
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if snapshot and snapshot.get('content_hash') == content_hash:
+                metrics.count('sheet.not_modified')
+                symbols = previous
+                source = 'unchanged'
+            else:
+                symbols = parse_symbols(response.content.decode('utf-8-sig'))
+                source = 'sheet'
+            self.save_snapshot({
+                'sheet_id': self.sheet_id,
+                'symbols': symbols,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash,
+                'fetched_at': datetime.now().isoformat(),
+            })
+        except Exception as e:
+            metrics.count('sheet.errors')
+            if not snapshot:
+                print(f"Error fetching Google Sheet: {e}")
+                return None
+            print(f"Error fetching Google Sheet: {e}. Using the snapshot from {snapshot.get('fetched_at')}.")
+            metrics.count('sheet.fallbacks')
+            return {'symbols': previous, 'added': [], 'removed': [], 'source': 'snapshot'}
+
+        previous_set, current_set = set(previous), set(symbols)
+        return {
+            'symbols': symbols,
+            'added': [symbol for symbol in symbols if symbol not in previous_set],
+            'removed': [symbol for symbol in previous if symbol not in current_set],
+            'source': source,
+        }
@@ -1,9 +1,14 @@
+import heapq
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+from app.monitoring.metrics import metrics
 
 class DataFormatter:
+    # KuCoin TA fields passed on to GPT (only for coins KuCoin returned data for)
+    KUCOIN_FIELDS = ['rsi_1d', 'rsi_7d', 'bb_width_1d', 'atr_pct_1d', 'volume_zscore_1d', 'obv_trend_1d']
+
     def __init__(self):
         # Define thresholds or scaling factors if needed
         self.max_coins_to_analyze = int(os.getenv('MAX_COINS_TO_ANALYZE', 10))
@@ -111,54 +116,52 @@ class DataFormatter:
     def format_for_gpt(self, coingecko_data, social_data, kucoin_data):
         """
         Format combined data into a structure suitable for GPT analysis.
-        Includes CoinGecko market data, social mentions, and KuCoin RSI data.
+        Includes CoinGecko market data, social mentions, and KuCoin TA data.
+        The input dicts are not modified.
         """
-        # print(coingecko_data)
-
         market_data = coingecko_data.get('market_data', [])
-        trending_coins = coingecko_data.get('trending_coins', [])
 
         # If no market data, we can't proceed
         if not market_data:
             print("  Formatter: No market data found.")
             return []
 
-        # Create merged data
-        merged_coins = []
-        for coin in market_data:
-            coin['symbol'] = coin['symbol'].upper()
-            
-            symbol = coin.get('symbol', '')
-            if not symbol:
-                continue
-            
-            coin_info = coin.copy()
-
-            # Add social data if available
-            coin_social = social_data.get(symbol, {})
-            coin_info['social_mentions'] = coin_social.get('reddit_mentions', 0)
-
-            # Add KuCoin RSI data if available
-            coin_kucoin = kucoin_data.get(symbol, {})
+        metrics.count('formatter.coins_in', len(market_data))
 
-            if coin_kucoin:
-                coin_info['rsi_1d'] = coin_kucoin.get('rsi_1d', 'n/a') # Will be None if not found/calculated
-                coin_info['rsi_7d'] = coin_kucoin.get('rsi_7d', 'n/a') # Will be None if not found/calculated
+        # --- Filtering/Ranking before sending to GPT ---
+        # Only the mention counts are needed to pick coins, so records are built for the selected few.
+        # This stays a plain loop: at the usual TOP_COINS_LIMIT a DataFrame costs more to set up than it saves.
+        with metrics.span('formatter.select'):
+            candidates = []
+            for coin in market_data:
+                symbol = str(coin.get('symbol') or '').upper()
+                if not symbol:
+                    continue
+                mentions = (social_data.get(symbol) or {}).get('reddit_mentions') or 0
+                if mentions > 10: # greater than 10 mentions
+                    candidates.append((mentions, symbol, coin))
+            print(f"  Formatter: Filtered to {len(candidates)} coins with social mentions.")
 
-            merged_coins.append(coin_info)
+            # nlargest keeps input order between equal mention counts, like a stable sort
+            selected = heapq.nlargest(max(self.max_coins_to_analyze, 0), candidates, key=lambda candidate: candidate[0])
+            print(f"  Formatter: Limited coins to {len(selected)}.")
 
-        # --- Filtering/Ranking before sending to GPT (Optional) ---
-        # Example: Prioritize trending coins or coins with high volume change
-        # For now, just limit the number of coins based on market cap rank
-        merged_coins.sort(key=lambda x: x.get('social_mentions', 0), reverse=True) # Sort by social mentions in descending order
-        
-        # Filter out coins with no social mentions
-        merged_coins = [coin for coin in merged_coins if coin.get('social_mentions', 0) > 10] # greater than 10 mentions
-        print(f"  Formatter: Filtered to {len(merged_coins)} coins with social mentions.")
+        limited_coins = []
+        for mentions, symbol, coin in selected:
+            # Copy so the caller's market data is not modified
+            coin_info = dict(coin, symbol=symbol)
+            coin_social = social_data.get(symbol) or {}
+            coin_info['social_mentions'] = int(mentions)
+            coin_info['social_sentiment'] = coin_social.get('social_sentiment')
 
-        limited_coins = merged_coins[:self.max_coins_to_analyze]
-        print(f"  Formatter: Limited coins to {len(limited_coins)}.")
+            # TA keys are only present for coins KuCoin returned data for
+            coin_kucoin = kucoin_data.get(symbol)
+            if coin_kucoin:
+                for field in self.KUCOIN_FIELDS:
+                    coin_info[field] = coin_kucoin.get(field)
+            limited_coins.append(coin_info)
 
+        metrics.count('formatter.coins_out', len(limited_coins))
         print(f"  Formatter: Prepared data for {len(limited_coins)} coins (out of {len(market_data)}).")
         return limited_coins
         
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+class RunMetrics:
+    """
+    Collects per-stage timings (spans) and counters for one pipeline run.
+
+    Span and counter names are dotted, with the stage first, e.g. span
+    'kucoin.kline' or counters 'kucoin.requests', 'gpt.tokens.prompt'.
+    A single shared instance, `metrics`, is used by all components.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, run_name=None):
+        """Start a new run, discarding everything recorded so far."""
+        with self._lock:
+            self.run_name = run_name
+            self.started_at = datetime.now()
+            self._start = time.perf_counter()
+            self.spans = {}
+            self.counters = {}
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block and add it to the span's totals."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.spans.setdefault(name, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+                stats['count'] += 1
+                stats['total_seconds'] += elapsed
+                stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+
+    def count(self, name, value=1):
+        """Add value to a counter (request counts, retries, bytes, cache hits, tokens, ...)."""
+        if not value:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, counters):
+        """Add counters recorded elsewhere, e.g. by a worker process, to this run's counters."""
+        for name, value in counters.items():
+            self.count(name, value)
+
+    @staticmethod
+    def payload_bytes(payload):
+        """Approximate size of a decoded API payload, for clients that do not expose raw response sizes."""
+        try:
+            return len(json.dumps(payload, default=str))
+        except Exception:
+            return 0
+
+    def snapshot(self):
+        """Return the run's metrics as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                'run': self.run_name,
+                'started_at': self.started_at.isoformat(),
+                'wall_seconds': round(time.perf_counter() - self._start, 4),
+                'spans': {
+                    name: {
+                        'count': stats['count'],
+                        'total_seconds': round(stats['total_seconds'], 4),
+                        'max_seconds': round(stats['max_seconds'], 4),
+                    }
+                    for name, stats in sorted(self.spans.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def write_report(self, path=None):
+        """
+        Append the run's metrics to a report file: one JSON object per line for
+        '.jsonl' paths, otherwise the file is overwritten with a single JSON document.
+        """
+        path = path or os.getenv('RUN_REPORT_PATH', 'reports/run_report.jsonl')
+        report = self.snapshot()
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if path.endswith('.jsonl'):
+                with open(path, 'a') as f:
+                    f.write(json.dumps(report) + "\n")
+            else:
+                with open(path, 'w') as f:
+                    json.dump(report, f, indent=2)
+            print(f"📊 Run report written to {path}")
+        except Exception as e:
+            print(f"Error writing run report to {path}: {e}")
+        return report
+
+    def print_summary(self):
+        """Print the slowest stages and the counters."""
+        report = self.snapshot()
+        print("\n📊 Stage timings:")
+        for name, stats in sorted(report['spans'].items(), key=lambda item: item[1]['total_seconds'], reverse=True):
+            print(f"  - {name}: {stats['total_seconds']:.2f}s over {stats['count']} call(s)")
+        if report['counters']:
+            print("📊 Counters:")
+            for name, value in report['counters'].items():
+                print(f"  - {name}: {value}")
+
+
+metrics = RunMetrics()
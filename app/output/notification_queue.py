@@ -0,0 +1,167 @@
+import os
+import atexit
+import asyncio
+import threading
+import concurrent.futures
+from telegram.error import RetryAfter, NetworkError
+from app.output.telegram_sender import AsyncTelegramSender, split_markdown_message
+from app.monitoring.metrics import metrics
+
+class NotificationQueue:
+    """
+    Outbound Telegram queue served by a background worker thread.
+
+    Messages can target any chat or forum topic. Each chat gets its own worker
+    task so a slow or rate-limited chat does not hold up the others, while a
+    shared limiter keeps the bot under Telegram's global rate. RetryAfter
+    responses are honoured and network errors retried with backoff.
+    """
+
+    def __init__(self, sender=None):
+        self.sender = sender or AsyncTelegramSender()
+        # Telegram allows about 30 messages/second overall, 1/second per chat and 20/minute per group
+        self.global_rate = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+        self.chat_interval = float(os.getenv('TELEGRAM_CHAT_INTERVAL', '1'))
+        self.group_interval = float(os.getenv('TELEGRAM_GROUP_INTERVAL', '3'))
+        self.max_retries = int(os.getenv('TELEGRAM_MAX_RETRIES', '5'))
+        self.flush_timeout = float(os.getenv('TELEGRAM_FLUSH_TIMEOUT', '120'))
+
+        self._loop = None
+        self._thread = None
+        self._queues = {}
+        self._workers = {}
+        self._next_chat_time = {}
+        self._next_global_time = 0
+        self._outstanding = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread and its event loop if they are not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            # Daemon thread: close() (also registered with atexit) flushes it on shutdown
+            self._thread = threading.Thread(target=self._loop.run_forever, name='telegram-queue', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def enqueue(self, message, chat_id=None, message_thread_id=None):
+        """
+        Queue a message for a chat (and optional forum topic).
+        Returns a concurrent.futures.Future that resolves to True once every chunk was sent.
+        """
+        self.start()
+        chat_id = str(chat_id or self.sender.chat_id)
+        future = asyncio.run_coroutine_threadsafe(self._deliver(message, chat_id, message_thread_id), self._loop)
+        with self._lock:
+            self._outstanding.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def broadcast(self, message, targets):
+        """Queue the same message for several (chat_id, message_thread_id) targets."""
+        return [self.enqueue(message, chat_id, thread_id) for chat_id, thread_id in targets]
+
+    def _forget(self, future):
+        with self._lock:
+            self._outstanding.discard(future)
+
+    async def _deliver(self, message, chat_id, message_thread_id):
+        """Hand the message to the chat's worker and wait until it has been sent."""
+        key = (chat_id, message_thread_id)
+        if key not in self._queues:
+            self._queues[key] = asyncio.Queue()
+            self._workers[key] = asyncio.ensure_future(self._chat_worker(key, self._queues[key]))
+        done = self._loop.create_future()
+        await self._queues[key].put((message, done))
+        return await done
+
+    async def _chat_worker(self, key, queue):
+        """Send one chat's messages in order."""
+        chat_id, message_thread_id = key
+        while True:
+            message, done = await queue.get()
+            try:
+                sent = True
+                for chunk in split_markdown_message(message):
+                    if not await self._send_with_retry(chunk, chat_id, message_thread_id):
+                        sent = False
+                        break
+                done.set_result(sent)
+            except Exception as e:
+                print(f"Error in Telegram queue worker for chat {chat_id}: {e}")
+                done.set_result(False)
+            finally:
+                queue.task_done()
+
+    async def _wait_for_slot(self, chat_id):
+        """Reserve the next send slot allowed by both the chat's and the global rate limit, then sleep until it."""
+        interval = self.group_interval if chat_id.startswith('-') else self.chat_interval
+        now = self._loop.time()
+        slot = max(now, self._next_chat_time.get(chat_id, 0), self._next_global_time)
+        self._next_chat_time[chat_id] = slot + interval
+        self._next_global_time = slot + 1 / self.global_rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _send_with_retry(self, text, chat_id, message_thread_id):
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_slot(chat_id)
+            try:
+                await self.sender.send_chunk(text, chat_id, message_thread_id)
+                return True
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                delay = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+                print(f"Telegram rate limit hit for chat {chat_id}, retrying in {delay:.1f}s")
+                metrics.count('telegram.retries')
+                # Flood control can be chat-wide or bot-wide, so hold back both
+                resume_at = self._loop.time() + delay
+                self._next_chat_time[chat_id] = max(self._next_chat_time.get(chat_id, 0), resume_at)
+                self._next_global_time = max(self._next_global_time, resume_at)
+            except NetworkError as e:
+                delay = min(30, 2 ** attempt)
+                print(f"Telegram network error for chat {chat_id} (attempt {attempt + 1}): {e}. Retrying in {delay}s")
+                metrics.count('telegram.retries')
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"Error sending Telegram message to chat {chat_id}: {e}")
+                return False
+        print(f"Giving up on Telegram message to chat {chat_id} after {self.max_retries + 1} attempts")
+        return False
+
+    def flush(self, timeout=None):
+        """Wait until every queued message has been sent or failed. Returns True if nothing is left."""
+        with self._lock:
+            pending = list(self._outstanding)
+        if not pending:
+            return True
+        _, not_done = concurrent.futures.wait(pending, timeout=self.flush_timeout if timeout is None else timeout)
+        if not_done:
+            print(f"Telegram queue: {len(not_done)} message(s) still unsent after flush timeout")
+        return not not_done
+
+    def close(self):
+        """Flush outstanding messages, close the bot and stop the worker thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.flush()
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+        except Exception as e:
+            print(f"Error closing Telegram queue: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+    async def _shutdown(self):
+        """Stop the per-chat workers and close the bot's connections."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
+        await self.sender.close()
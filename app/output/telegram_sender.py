@@ -1,50 +1,297 @@
 import os
+import re
+import atexit
 import asyncio
-from telegram import Bot
+import threading
+import concurrent.futures
 from datetime import datetime
-import pandas as pd
+from app.monitoring.metrics import metrics
+
+# Telegram rejects messages longer than this many characters
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+# Legacy Markdown entities that must not be split across messages
+MARKDOWN_ENTITY_PATTERN = re.compile(r"```.*?```|`[^`\n]*`|\*[^*]*\*|_[^_]*_|\[[^\]]*\]\([^)]*\)", re.DOTALL)
+
+
+def _markdown_units(text):
+    """Split text into pieces that are safe to break between: whole entities, words and newlines."""
+    units = []
+    position = 0
+    for match in MARKDOWN_ENTITY_PATTERN.finditer(text):
+        units.extend(re.findall(r"[^ \n]*[ \n]?", text[position:match.start()]))
+        units.append(match.group(0))
+        position = match.end()
+    units.extend(re.findall(r"[^ \n]*[ \n]?", text[position:]))
+    return [unit for unit in units if unit]
+
+
+def _split_oversized_unit(unit, limit):
+    """Hard-split a single piece longer than the limit, closing and reopening its entity markers."""
+    marker = ''
+    for candidate in ('```', '`', '*', '_'):
+        if unit.startswith(candidate) and unit.endswith(candidate) and len(unit) > 2 * len(candidate):
+            marker = candidate
+            break
+    body = unit[len(marker):len(unit) - len(marker)] if marker else unit
+    size = limit - 2 * len(marker)
+    return [f"{marker}{body[i:i + size]}{marker}" for i in range(0, len(body), size)]
+
+
+def _break_index(units):
+    """
+    How many leading units to send as one chunk: up to the last paragraph break in the
+    second half of the text, else the last line break there, else all of them (so a
+    break near the start never leaves a tiny chunk behind).
+    """
+    total = sum(len(unit) for unit in units)
+    length = 0
+    paragraph = line = None
+    previous = ''
+    for i, unit in enumerate(units):
+        length += len(unit)
+        if unit.endswith('\n') and length * 2 >= total:
+            line = i + 1
+            if unit == '\n' and previous.endswith('\n'):
+                paragraph = i + 1
+        previous = unit
+    return paragraph or line or len(units)
+
+
+def split_markdown_message(text, limit=TELEGRAM_MAX_MESSAGE_LENGTH):
+    """
+    Split a Markdown message into chunks of at most `limit` characters.
+    Prefers breaking at blank lines, then line ends, then spaces, and never
+    breaks inside a *bold*, _italic_, `code`, ```pre``` or [link](url) entity.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks = []
+    current = []
+    current_length = 0
+    for unit in _markdown_units(text):
+        pieces = _split_oversized_unit(unit, limit) if len(unit) > limit else [unit]
+        for piece in pieces:
+            # Cut until the piece fits; every cut sends at least one unit, and `current` never exceeds the limit
+            while current and current_length + len(piece) > limit:
+                cut = _break_index(current)
+                chunks.append(''.join(current[:cut]))
+                current = current[cut:]
+                current_length = sum(len(part) for part in current)
+            current.append(piece)
+            current_length += len(piece)
+    if current:
+        chunks.append(''.join(current))
+    return [chunk.strip('\n') for chunk in chunks if chunk.strip()]
+
+
+class AsyncTelegramSender:
+    """Long-lived async sender that reuses one Bot and its HTTP connection pool."""
+
+    def __init__(self, token=None, chat_id=None, base_url=None):
+        self.token = token or os.getenv('TELEGRAM_BOT_TOKEN')
+        self.chat_id = chat_id or os.getenv('TELEGRAM_CHAT_ID')
+        # Override to point at a local fake Bot API for testing
+        self.base_url = base_url or os.getenv('TELEGRAM_BASE_URL', 'https://api.telegram.org/bot')
+        self.enabled = self.token is not None and self.chat_id is not None
+        self.bot = None
+        self._start_lock = None
+
+    async def start(self):
+        """Create and initialize the Bot on first use."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.bot is None:
+                # python-telegram-bot (and httpx) are only imported once something is sent
+                from telegram import Bot
+                from telegram.request import HTTPXRequest
+                bot = Bot(token=self.token, base_url=self.base_url, request=HTTPXRequest(connection_pool_size=8))
+                await bot.initialize()
+                self.bot = bot
+        return self.bot
+
+    async def send_chunk(self, text, chat_id=None, message_thread_id=None):
+        """Send one message that already fits Telegram's length limit. Errors are raised to the caller."""
+        bot = await self.start()
+        metrics.count('telegram.requests')
+        metrics.count('telegram.bytes', len(text.encode('utf-8')))
+        with metrics.span('telegram.send'):
+            return await bot.send_message(
+                chat_id=chat_id or self.chat_id,
+                text=text,
+                parse_mode='Markdown',
+                message_thread_id=message_thread_id
+            )
+
+    async def send_message(self, message, chat_id=None, message_thread_id=None):
+        """Send a message, split into as many chunks as Telegram's length limit requires"""
+        if not self.enabled:
+            return False
+
+        try:
+            for chunk in split_markdown_message(message):
+                await self.send_chunk(chunk, chat_id, message_thread_id)
+            return True
+        except Exception as e:
+            metrics.count('telegram.errors')
+            print(f"Error sending Telegram message: {e}")
+            return False
+
+    async def close(self):
+        """Close the Bot's HTTP connections."""
+        if self.bot is not None:
+            bot, self.bot = self.bot, None
+            await bot.shutdown()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def parse_chat_targets(value):
+    """
+    Parse a comma-separated list of Telegram destinations into (chat_id, message_thread_id) tuples.
+    Each entry is either a chat ID or 'chat_id:thread_id' for a forum topic.
+    """
+    targets = []
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        chat_id, _, thread_id = entry.partition(':')
+        targets.append((chat_id.strip(), int(thread_id) if thread_id.strip() else None))
+    return targets
+
+
+def _all_delivered(futures):
+    """A future that resolves to True once every one of `futures` resolved to True."""
+    combined = concurrent.futures.Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def _done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        combined.set_result(all(future.exception() is None and future.result() for future in futures))
+
+    if not futures:
+        combined.set_result(True)
+    for future in futures:
+        future.add_done_callback(_done)
+    return combined
+
 
 class TelegramSender:
     def __init__(self):
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
-        self.enabled = self.token is not None and self.chat_id is not None
+        # TELEGRAM_CHAT_IDS fans messages out to several chats/topics; defaults to TELEGRAM_CHAT_ID
+        self.targets = parse_chat_targets(os.getenv('TELEGRAM_CHAT_IDS') or self.chat_id)
+        self.enabled = self.token is not None and len(self.targets) > 0
         self.max_coins = int(os.getenv('MAX_COINS_TELEGRAM', '10')) # <-- Wrap with int()
+        self.sender = AsyncTelegramSender(self.token, self.chat_id or (self.targets[0][0] if self.targets else None))
+        # One event loop for the life of the sender so the Bot's connections stay usable
+        self._loop = None
+        # Send from a background worker instead of inline with the analysis
+        self.use_queue = os.getenv('TELEGRAM_USE_QUEUE', 'false').lower() == 'true'
+        self.queue = None
 
         if not self.enabled:
             print("Telegram bot not configured. Set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID to enable.")
-            
+
+    def _run(self, coroutine):
+        """Run a coroutine on the sender's persistent event loop."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            atexit.register(self.close)
+        return self._loop.run_until_complete(coroutine)
+
+    def _get_queue(self):
+        if self.queue is None:
+            from app.output.notification_queue import NotificationQueue
+            self.queue = NotificationQueue(AsyncTelegramSender(self.token, self.sender.chat_id))
+            atexit.register(self.close)
+        return self.queue
+
     async def send_message_async(self, message):
-        """Send message asynchronously"""
+        """Send message asynchronously to every configured chat"""
         if not self.enabled:
             return False
+        results = [await self.sender.send_message(message, chat_id, thread_id) for chat_id, thread_id in self.targets]
+        return all(results)
             
+    def send_message_later(self, message):
+        """
+        Start sending message to every configured chat and return a concurrent.futures.Future
+        that resolves to True once it was delivered to all of them. With TELEGRAM_USE_QUEUE=true
+        the background worker sends it (rate limits, retries) while the caller carries on;
+        otherwise it is sent before this returns and the future is already resolved.
+        """
+        if self.use_queue and self.enabled:
+            return _all_delivered(self._get_queue().broadcast(message, self.targets))
+        delivery = concurrent.futures.Future()
+        delivery.set_result(self._run(self.send_message_async(message)))
+        return delivery
+
+    def wait_for_delivery(self, delivery):
+        """
+        Block until a send_message_later() future resolves, at most TELEGRAM_FLUSH_TIMEOUT
+        seconds in queue mode. Returns False when the message was not delivered in time.
+        """
+        timeout = self.queue.flush_timeout if self.queue is not None else None
         try:
-            bot = Bot(token=self.token)
-            await bot.send_message(chat_id=self.chat_id, text=message, parse_mode='Markdown')
-            return True
-        except Exception as e:
-            print(f"Error sending Telegram message: {e}")
+            return delivery.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            print(f"Telegram queue: message not delivered within {timeout:.0f}s")
             return False
-            
+
     def send_message(self, message):
-        """Send message (synchronous wrapper)"""
-        return asyncio.run(self.send_message_async(message))
+        """Send message (synchronous wrapper). Returns True once it was delivered to every chat."""
+        return self.wait_for_delivery(self.send_message_later(message))
+
+    def close(self):
+        """Flush queued messages, then close the Bot's connections and the event loop."""
+        if self.queue is not None:
+            self.queue.close()
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.run_until_complete(self.sender.close())
+        except Exception as e:
+            print(f"Error closing Telegram sender: {e}")
+        finally:
+            self._loop.close()
         
-    def format_analysis_for_telegram(self, analysis_result, coingecko_data, social_mentions_data, kucoin_data):
-        """Format analysis results for Telegram message"""
+    def top_coins(self, analysis_result):
+        """The analysis entries included in the Telegram report, highest breakout score first."""
         if not analysis_result or 'analysis' not in analysis_result:
-            return "No analysis data available to send."
-            
+            return []
         analysis_data = analysis_result['analysis']
-            
         # Sort by breakout score (descending)
         if isinstance(analysis_data, list):
             sorted_coins = sorted(analysis_data, key=lambda x: float(x.get('breakout_score', 0)), reverse=True)
-            top_coins = sorted_coins[:self.max_coins]
-        else:
-            # Single coin case
-            top_coins = [analysis_data]
+            return sorted_coins[:self.max_coins]
+        # Single coin case
+        return [analysis_data]
+
+    def format_analysis_for_telegram(self, analysis_result, coingecko_data, social_mentions_data, kucoin_data, score_history=None):
+        """
+        Format analysis results for Telegram message.
+        score_history ({'SYMBOL': [previous scores, oldest first]}) adds the change since the last run.
+        """
+        if not analysis_result or 'analysis' not in analysis_result:
+            return "No analysis data available to send."
+            
+        analysis_data = analysis_result['analysis']
+        top_coins = self.top_coins(analysis_result)
+        score_history = score_history or {}
         
         top_symbols = [i.get('coin_symbol', '').upper() for i in top_coins]
 
@@ -68,24 +315,45 @@ class TelegramSender:
             kucoin_data_item = kucoin_data.get(symbol, {})
 
             social_mentions = social_mentions_data_item.get('reddit_mentions', 0)
+            social_sentiment = social_mentions_data_item.get('social_sentiment')
+            social_sentiment = 'n/a' if social_sentiment is None else f"{social_sentiment:+.2f}"
             current_price = round(coingecko_data_item.get('current_price', 0), 4)
             price_change_24h = round(coingecko_data_item.get('price_change_percentage_24h', 0), 2)
             price_change_7d = round(coingecko_data_item.get('price_change_percentage_7d_in_currency', 0), 2)
             is_trending = coingecko_data_item.get('is_trending', False)
             rsi_1d = kucoin_data_item.get('rsi_1d', 'n/a')
             rsi_7d = kucoin_data_item.get('rsi_7d', 'n/a')
+            bb_width, atr_pct, volume_zscore, obv_trend = (
+                'n/a' if kucoin_data_item.get(key) is None else kucoin_data_item[key]
+                for key in ('bb_width_1d', 'atr_pct_1d', 'volume_zscore_1d', 'obv_trend_1d')
+            )
+
+            previous_scores = score_history.get(symbol)
+            score_change = ''
+            if previous_scores:
+                try:
+                    score_change = f" ({float(score) - previous_scores[-1]:+g} vs last run)"
+                except (TypeError, ValueError):
+                    pass
 
-            message += f"*{i}. {symbol} - Score: {score}/10* \
-                \n Social Mentions: {social_mentions} | Trending: {'Yes' if is_trending else 'No'} \
+            message += f"*{i}. {symbol} - Score: {score}/10*{score_change} \
+                \n Social Mentions: {social_mentions} | Sentiment: {social_sentiment} | Trending: {'Yes' if is_trending else 'No'} \
                 \n Price: ${current_price} | 24H: {price_change_24h}% | 7D: {price_change_7d}% \
                 \n RSI 1D: {rsi_1d} | RSI 7D: {rsi_7d} \
+                \n BB Width: {bb_width}% | ATR: {atr_pct}% | Vol Z: {volume_zscore} | OBV: {obv_trend} \
                 \n _{reason}_\n\n"
             
         message += "\n_This is an automated analysis and not financial advice._"
         
         return message
         
-    def send_analysis(self, analysis_result, coingecko_data, social_mentions_data, kucoin_data):
+    def send_analysis(self, analysis_result, coingecko_data, social_mentions_data, kucoin_data, score_history=None):
         """Format and send analysis results via Telegram"""
-        message = self.format_analysis_for_telegram(analysis_result, coingecko_data, social_mentions_data, kucoin_data)
-        return self.send_message(message) 
\ No newline at end of file
+        return self.wait_for_delivery(self.send_analysis_later(analysis_result, coingecko_data, social_mentions_data,
+                                                              kucoin_data, score_history))
+
+    def send_analysis_later(self, analysis_result, coingecko_data, social_mentions_data, kucoin_data, score_history=None):
+        """Format the analysis results and start sending them; returns the send_message_later() future."""
+        message = self.format_analysis_for_telegram(analysis_result, coingecko_data, social_mentions_data, kucoin_data,
+                                                    score_history)
+        return self.send_message_later(message) 
\ No newline at end of file
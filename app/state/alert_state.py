@@ -0,0 +1,131 @@
+import os
+import json
+from datetime import datetime, timedelta
+
+class AlertStateStore:
+    """
+    Persistent per-symbol state for sell alerts, stored as a JSON file.
+    Each entry looks like:
+    {'overbought': True, 'rsi_1d': 82.1, 'rsi_7d': 74.3, 'last_alert': '2024-01-01T12:00:00'}
+    where the RSI values are the ones included in the last alert for the symbol.
+    """
+
+    def __init__(self, path=None, rsi_1d_threshold=80, rsi_7d_threshold=70):
+        self.path = path or os.getenv('ALERT_STATE_PATH', '.state/alert_state.json')
+        self.rsi_1d_threshold = rsi_1d_threshold
+        self.rsi_7d_threshold = rsi_7d_threshold
+        # A symbol leaves the overbought zone only after dropping this far below a threshold
+        self.hysteresis = float(os.getenv('RSI_SELL_HYSTERESIS', '5'))
+        # Minimum RSI change, and time since the last alert, before re-alerting a symbol that is still overbought
+        self.material_move = float(os.getenv('RSI_MATERIAL_MOVE', '5'))
+        self.cooldown = timedelta(hours=float(os.getenv('ALERT_COOLDOWN_HOURS', '24')))
+        self.state = self.load()
+
+    def load(self):
+        """Load state from disk, starting empty if the file is missing or unreadable."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading alert state from {self.path}: {e}. Starting with empty state.")
+            return {}
+
+    def save(self):
+        """Write state to disk atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _is_overbought(self, rsi_1d, rsi_7d, was_overbought):
+        """Threshold check with hysteresis on the way out."""
+        margin = self.hysteresis if was_overbought else 0
+        return rsi_1d >= self.rsi_1d_threshold - margin and rsi_7d >= self.rsi_7d_threshold - margin
+
+    def diff(self, ku_data, now=None):
+        """
+        Compare the latest RSI values against the stored state.
+        Returns {'new': [...], 'moved': [...], 'exited': [...]}, each a list of
+        {'symbol', 'rsi_1d', 'rsi_7d', 'prev_rsi_1d', 'prev_rsi_7d'} dicts.
+        The state is not changed until apply() is called.
+        """
+        now = now or datetime.now()
+        changes = {'new': [], 'moved': [], 'exited': []}
+        for symbol, metrics in ku_data.items():
+            rsi_1d = metrics.get('rsi_1d')
+            rsi_7d = metrics.get('rsi_7d')
+            if rsi_1d is None or rsi_7d is None:
+                continue
+
+            previous = self.state.get(symbol, {})
+            was_overbought = previous.get('overbought', False)
+            overbought = self._is_overbought(rsi_1d, rsi_7d, was_overbought)
+            item = {
+                'symbol': symbol,
+                'rsi_1d': rsi_1d,
+                'rsi_7d': rsi_7d,
+                'prev_rsi_1d': previous.get('rsi_1d'),
+                'prev_rsi_7d': previous.get('rsi_7d'),
+            }
+
+            if overbought and not was_overbought:
+                changes['new'].append(item)
+            elif was_overbought and not overbought:
+                changes['exited'].append(item)
+            elif overbought:
+                last_alert = previous.get('last_alert')
+                cooled_down = last_alert is None or now - datetime.fromisoformat(last_alert) >= self.cooldown
+                moved = (abs(rsi_1d - (previous.get('rsi_1d') or 0)) >= self.material_move
+                         or abs(rsi_7d - (previous.get('rsi_7d') or 0)) >= self.material_move)
+                if cooled_down and moved:
+                    changes['moved'].append(item)
+        return changes
+
+    def apply(self, changes, now=None):
+        """Record the alerted changes in the state."""
+        now = (now or datetime.now()).isoformat()
+        for key in ('new', 'moved', 'exited'):
+            for item in changes.get(key, []):
+                self.state[item['symbol']] = {
+                    'overbought': key != 'exited',
+                    'rsi_1d': item['rsi_1d'],
+                    'rsi_7d': item['rsi_7d'],
+                    'last_alert': now,
+                }
+
+    def prune(self, symbols):
+        """Drop state for symbols that are no longer on the watchlist."""
+        keep = set(symbols)
+        self.state = {symbol: entry for symbol, entry in self.state.items() if symbol in keep}
+
+    @staticmethod
+    def has_changes(changes):
+        return any(changes.get(key) for key in ('new', 'moved', 'exited'))
+
+    @staticmethod
+    def format_message(changes):
+        """Render a Telegram Markdown message for the changes."""
+        message = "*🚨 SELL Alert: KuCoin Overbought Signals 🚨*\n\n"
+        if changes.get('new'):
+            message += "*New overbought:*\n"
+            for item in changes['new']:
+                message += f"*{item['symbol']}* - RSI 1D: {item['rsi_1d']}, RSI 7D: {item['rsi_7d']}\n"
+            message += "\n"
+        if changes.get('moved'):
+            message += "*Still overbought, RSI moved:*\n"
+            for item in changes['moved']:
+                message += (f"*{item['symbol']}* - RSI 1D: {item['prev_rsi_1d']} → {item['rsi_1d']}, "
+                            f"RSI 7D: {item['prev_rsi_7d']} → {item['rsi_7d']}\n")
+            message += "\n"
+        if changes.get('exited'):
+            message += "*No longer overbought:*\n"
+            for item in changes['exited']:
+                message += f"*{item['symbol']}* - RSI 1D: {item['rsi_1d']}, RSI 7D: {item['rsi_7d']}\n"
+            message += "\n"
+        message += "_This is an automated alert by your script._"
+        return message
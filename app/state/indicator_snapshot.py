@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+# Timeframe -> (RSI key, MACD key) in KuCoinCollector.collect results
+TIMEFRAMES = {
+    '1d': ('rsi_1d', 'macd_1d'),
+    '1w': ('rsi_7d', 'macd_1w'),
+}
+MACD_FIELDS = ['macd_line', 'macd_signal', 'macd_histogram', 'histogram_trend', 'histogram_percentage_diff']
+# Stored under f'{field}_{timeframe}' in the collect results
+EXTRA_FIELDS = ['bb_width', 'atr_pct', 'volume_zscore', 'obv_trend']
+TEXT_FIELDS = {'histogram_trend', 'obv_trend'}
+VALUE_FIELDS = ['rsi', *MACD_FIELDS, *EXTRA_FIELDS]
+
+
+class IndicatorSnapshotStore:
+    """
+    Latest KuCoin indicators per (symbol, timeframe) in a small SQLite table, so
+    "what are BTC's RSI and MACD right now?" is a primary-key lookup instead of a scan.
+    Bollinger width, ATR %, volume z-score and OBV trend are stored alongside.
+    Every row carries the time it was computed; rows older than `max_age` seconds are
+    reported as stale and can be refreshed from KuCoin in the background.
+    """
+
+    def __init__(self, path=None, max_age=None):
+        self.path = path or os.getenv('INDICATOR_SNAPSHOT_PATH', '.state/indicator_snapshots.sqlite')
+        self.max_age = float(max_age or os.getenv('INDICATOR_MAX_AGE_SECONDS', '3600'))
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS indicator_snapshots (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    {', '.join(f'{field} {_column_type(field)}' for field in VALUE_FIELDS)},
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, timeframe)
+                ) WITHOUT ROWID
+            """)
+            # Snapshot files created before the extra indicators were stored
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(indicator_snapshots)")}
+            for field in EXTRA_FIELDS:
+                if field not in columns:
+                    conn.execute(f"ALTER TABLE indicator_snapshots ADD COLUMN {field} {_column_type(field)}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL with NORMAL sync: one small commit per symbol without an fsync each time
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def upsert(self, results, now=None):
+        """
+        Store KuCoinCollector.collect results
+        ({'SYMBOL': {'rsi_1d', 'macd_1d', 'bb_width_1d', ..., 'rsi_7d', 'macd_1w', 'bb_width_1w', ...}}).
+        """
+        now = now or time.time()
+        rows = []
+        for symbol, values in results.items():
+            for timeframe, (rsi_key, macd_key) in TIMEFRAMES.items():
+                if values.get(rsi_key) is None:
+                    continue
+                macd = values.get(macd_key) or {}
+                rows.append((symbol.upper(), timeframe, values[rsi_key], *[macd.get(field) for field in MACD_FIELDS],
+                             *[values.get(f'{field}_{timeframe}') for field in EXTRA_FIELDS], now))
+        if rows:
+            with self._connect() as conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO indicator_snapshots (symbol, timeframe, {', '.join(VALUE_FIELDS)}, updated_at) "
+                    f"VALUES ({', '.join('?' * (len(VALUE_FIELDS) + 3))})", rows
+                )
+        return len(rows)
+
+    def get(self, symbols, timeframes=None, now=None):
+        """
+        Look up the latest indicators for symbols.
+        Returns {'SYMBOL': {'1d': {'rsi', 'macd': {...}, 'bb_width', 'atr_pct', 'volume_zscore', 'obv_trend',
+        'updated_at', 'age_seconds', 'stale'}, '1w': {...}}};
+        symbols or timeframes never stored are missing from the result.
+        """
+        now = now or time.time()
+        symbols = [symbol.upper() for symbol in symbols]
+        timeframes = list(timeframes or TIMEFRAMES)
+        query = (f"SELECT symbol, timeframe, {', '.join(VALUE_FIELDS)}, updated_at FROM indicator_snapshots "
+                 f"WHERE symbol IN ({', '.join('?' * len(symbols))}) AND timeframe IN ({', '.join('?' * len(timeframes))})")
+        snapshot = {}
+        with self._connect() as conn:
+            for row in conn.execute(query, symbols + timeframes):
+                symbol, timeframe = row[:2]
+                values = dict(zip(VALUE_FIELDS, row[2:-1]))
+                macd = {field: values[field] for field in MACD_FIELDS}
+                updated_at = row[-1]
+                snapshot.setdefault(symbol, {})[timeframe] = {
+                    'rsi': values['rsi'],
+                    'macd': macd if macd['macd_line'] is not None else None,
+                    **{field: values[field] for field in EXTRA_FIELDS},
+                    'updated_at': updated_at,
+                    'age_seconds': round(now - updated_at, 1),
+                    'stale': now - updated_at > self.max_age,
+                }
+        return snapshot
+
+    def evict(self, symbols):
+        """Delete every timeframe's entry for symbols. Returns the number of rows deleted."""
+        with self._connect() as conn:
+            cursor = conn.executemany("DELETE FROM indicator_snapshots WHERE symbol = ?",
+                                      [(symbol.upper(),) for symbol in symbols])
+            return cursor.rowcount
+
+    def stale_symbols(self, symbols, snapshot=None, timeframes=None):
+        """Symbols with a missing or stale entry for any of the timeframes."""
+        timeframes = list(timeframes or TIMEFRAMES)
+        snapshot = snapshot if snapshot is not None else self.get(symbols, timeframes)
+        stale = []
+        for symbol in symbols:
+            entries = snapshot.get(symbol.upper(), {})
+            if any(timeframe not in entries or entries[timeframe]['stale'] for timeframe in timeframes):
+                stale.append(symbol.upper())
+        return stale
+
+    def refresh(self, symbols, collector=None):
+        """Recompute indicators for symbols from KuCoin and store them. Returns the collect results."""
+        if collector is None:
+            from app.collectors.kucoin_collector import KuCoinCollector
+            collector = KuCoinCollector(enabled=True)
+        results = collector.collect(symbols)
+        self.upsert(results)
+        return results
+
+    def refresh_in_background(self, symbols, collector=None):
+        """
+        Refresh symbols on a daemon thread, skipping any already being refreshed.
+        Returns the thread, or None when there is nothing new to refresh.
+        """
+        with self._refresh_lock:
+            pending = [symbol for symbol in symbols if symbol not in self._refreshing]
+            self._refreshing.update(pending)
+        if not pending:
+            return None
+
+        def run():
+            try:
+                self.refresh(pending, collector)
+            except Exception as e:
+                print(f"Error refreshing indicator snapshots for {pending}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.difference_update(pending)
+
+        thread = threading.Thread(target=run, name='indicator-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    def query(self, symbols, timeframes=None, refresh='background', collector=None):
+        """
+        Answer from the snapshot. With refresh='sync', stale symbols are recomputed first;
+        with 'background' they are recomputed after answering; with 'none' never.
+        """
+        snapshot = self.get(symbols, timeframes)
+        stale = self.stale_symbols(symbols, snapshot, timeframes)
+        if stale and refresh == 'sync':
+            self.refresh(stale, collector)
+            snapshot = self.get(symbols, timeframes)
+        elif stale and refresh == 'background':
+            self.refresh_in_background(stale, collector)
+        return snapshot
+
+
+def _column_type(field):
+    return 'TEXT' if field in TEXT_FIELDS else 'REAL'
+
+
+def _print_snapshot(snapshot, symbols):
+    for symbol in symbols:
+        entries = snapshot.get(symbol.upper())
+        if not entries:
+            print(f"{symbol.upper():<8} no snapshot")
+            continue
+        for timeframe, entry in sorted(entries.items()):
+            macd = entry['macd'] or {}
+            histogram = macd.get('macd_histogram')
+            trend = macd.get('histogram_trend') or '-'
+            age = f"{entry['age_seconds'] / 60:.0f}m ago{' (stale)' if entry['stale'] else ''}"
+            extras = '  '.join(f"{label} {entry.get(field) if entry.get(field) is not None else '-'}"
+                               for label, field in (('BBW%', 'bb_width'), ('ATR%', 'atr_pct'), ('VolZ', 'volume_zscore'),
+                                                    ('OBV', 'obv_trend')))
+            print(f"{symbol.upper():<8} {timeframe:<3} RSI {entry['rsi']:>6.2f}   "
+                  f"MACD hist {histogram if histogram is not None else '-':>12} {trend:<10} {extras}  {age}")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Query the latest stored KuCoin indicators per symbol.")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--timeframes', nargs='+', choices=list(TIMEFRAMES), default=None)
+    parser.add_argument('--path', default=None, help="Snapshot database (default INDICATOR_SNAPSHOT_PATH)")
+    parser.add_argument('--max-age', type=float, default=None, help="Seconds before an entry counts as stale")
+    parser.add_argument('--refresh', choices=['none', 'sync', 'background'], default='none',
+                        help="sync: recompute stale entries before answering; background: answer, then recompute")
+    parser.add_argument('--json', action='store_true', help="Print the snapshot as JSON")
+    args = parser.parse_args()
+
+    store = IndicatorSnapshotStore(path=args.path, max_age=args.max_age)
+    start = time.perf_counter()
+    snapshot = store.query(args.symbols, args.timeframes, refresh='sync' if args.refresh == 'sync' else 'none')
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(snapshot, indent=2))
+    else:
+        _print_snapshot(snapshot, args.symbols)
+        print(f"({elapsed * 1000:.1f} ms)")
+
+    stale = store.stale_symbols(args.symbols, snapshot, args.timeframes)
+    if stale and args.refresh == 'background':
+        # The process would exit before a daemon thread finishes, so wait for it here
+        print(f"Refreshing {len(stale)} stale symbol(s)...")
+        thread = store.refresh_in_background(stale)
+        if thread is not None:
+            thread.join()
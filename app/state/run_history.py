@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+
+
+def _score(value):
+    """GPT returns breakout_score as a number or a numeric string; anything else is None."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RunHistoryStore:
+    """
+    Append-only history of GPT breakout scores and sent Telegram alerts across runs,
+    in SQLite indexed on (symbol, recorded_at), so "SOL's score over the last 30 days"
+    or "coins whose score rose 3+ points" is an index range scan instead of a re-run
+    of the pipeline. Every run gets a row in `runs`; scores and alerts point at it.
+    GPT request latencies are kept too, for GPTAnalyzer's hedge percentile.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('RUN_HISTORY_PATH', '.state/run_history.sqlite')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY,
+                    job TEXT NOT NULL,
+                    model TEXT,
+                    started_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS scores (
+                    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                    symbol TEXT NOT NULL,
+                    score REAL,
+                    reason TEXT,
+                    recorded_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS scores_symbol_time ON scores (symbol, recorded_at);
+                CREATE INDEX IF NOT EXISTS scores_time ON scores (recorded_at);
+                CREATE TABLE IF NOT EXISTS alerts (
+                    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                    job TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    details TEXT,
+                    recorded_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS alerts_symbol_time ON alerts (symbol, recorded_at);
+                CREATE INDEX IF NOT EXISTS alerts_time ON alerts (recorded_at);
+                CREATE TABLE IF NOT EXISTS gpt_latencies (
+                    model TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    recorded_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS gpt_latencies_time ON gpt_latencies (recorded_at);
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL with NORMAL sync: a few small appends per run without an fsync each time
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start_run(self, job, model=None, now=None):
+        """Register a run of `job` ('breakouts', 'assets') and return its run_id."""
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT INTO runs (job, model, started_at) VALUES (?, ?, ?)",
+                                  (job, model, now or time.time()))
+            return cursor.lastrowid
+
+    def record_analysis(self, analysis_result, job='breakouts', now=None):
+        """
+        Append the scores of a GPTAnalyzer.analyze result. Error results and runs where
+        GPT was skipped (placeholder scores of 0) are not recorded.
+        Returns the run_id, or None when nothing was recorded.
+        """
+        if not analysis_result or 'error' in analysis_result or analysis_result.get('model_used') == 'skipped':
+            return None
+        analysis = analysis_result.get('analysis')
+        if not isinstance(analysis, list) or not analysis:
+            return None
+        now = now or time.time()
+        rows = [
+            (coin.get('coin_symbol', '').upper(), _score(coin.get('breakout_score')), coin.get('reason'), now)
+            for coin in analysis if coin.get('coin_symbol')
+        ]
+        run_id = self.start_run(job, analysis_result.get('model_used'), now)
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO scores (run_id, symbol, score, reason, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                             [(run_id, *row) for row in rows])
+        return run_id
+
+    def record_alerts(self, job, alerts, run_id=None, now=None):
+        """
+        Append the alerts delivered by one run: a list of {'symbol', 'kind', ...} dicts
+        where the remaining keys (score, RSI values) are stored as JSON details.
+        Starts a run for `job` when no run_id is given. Returns the run_id.
+        """
+        now = now or time.time()
+        if run_id is None:
+            run_id = self.start_run(job, now=now)
+        rows = []
+        for alert in alerts:
+            details = {key: value for key, value in alert.items() if key not in ('symbol', 'kind')}
+            rows.append((run_id, job, alert['symbol'].upper(), alert['kind'], json.dumps(details) if details else None, now))
+        if rows:
+            with self._connect() as conn:
+                conn.executemany("INSERT INTO alerts (run_id, job, symbol, kind, details, recorded_at) VALUES (?, ?, ?, ?, ?, ?)",
+                                 rows)
+        return run_id
+
+    def record_latency(self, model, seconds, now=None):
+        """Append the latency of one successful GPT request (used for the hedge percentile)."""
+        with self._connect() as conn:
+            conn.execute("INSERT INTO gpt_latencies (model, seconds, recorded_at) VALUES (?, ?, ?)",
+                         (model, seconds, now or time.time()))
+
+    def recent_latencies(self, limit=50):
+        """The last `limit` GPT request latencies in seconds, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT seconds FROM gpt_latencies ORDER BY recorded_at DESC LIMIT ?", (limit,)).fetchall()
+        return [seconds for seconds, in reversed(rows)]
+
+    def score_trend(self, symbol, days=30, now=None):
+        """[(recorded_at, score), ...] for one symbol within the last `days`, oldest first."""
+        cutoff = (now or time.time()) - days * 86400
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT recorded_at, score FROM scores WHERE symbol = ? AND recorded_at >= ? ORDER BY recorded_at",
+                (symbol.upper(), cutoff)
+            ).fetchall()
+
+    def recent_scores(self, symbols, limit=5, days=30, now=None):
+        """
+        The last `limit` scores per symbol within the last `days`, oldest first:
+        {'SOL': [4.0, 6.0, 7.0], ...}. Symbols without history are missing.
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+        if not symbols:
+            return {}
+        cutoff = (now or time.time()) - days * 86400
+        query = f"""
+            SELECT symbol, score FROM (
+                SELECT symbol, score, recorded_at,
+                       ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY recorded_at DESC) AS position
+                FROM scores
+                WHERE symbol IN ({', '.join('?' * len(symbols))}) AND recorded_at >= ? AND score IS NOT NULL
+            )
+            WHERE position <= ?
+            ORDER BY symbol, recorded_at
+        """
+        history = {}
+        with self._connect() as conn:
+            for symbol, score in conn.execute(query, [*symbols, cutoff, limit]):
+                history.setdefault(symbol, []).append(score)
+        return history
+
+    def risers(self, min_rise=3, days=30, now=None):
+        """
+        Symbols whose latest score is at least `min_rise` above their lowest earlier score
+        within the last `days`, largest rise first:
+        [{'symbol', 'score', 'low', 'rise', 'recorded_at'}, ...]
+        """
+        cutoff = (now or time.time()) - days * 86400
+        query = """
+            WITH window_scores AS (
+                SELECT symbol, score, recorded_at,
+                       ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY recorded_at DESC) AS position
+                FROM scores
+                WHERE recorded_at >= ? AND score IS NOT NULL
+            )
+            SELECT latest.symbol, latest.score, MIN(earlier.score) AS low, latest.score - MIN(earlier.score) AS rise,
+                   latest.recorded_at
+            FROM window_scores AS latest
+            JOIN window_scores AS earlier ON earlier.symbol = latest.symbol AND earlier.position > 1
+            WHERE latest.position = 1
+            GROUP BY latest.symbol
+            HAVING rise >= ?
+            ORDER BY rise DESC, latest.symbol
+        """
+        with self._connect() as conn:
+            rows = conn.execute(query, (cutoff, min_rise)).fetchall()
+        return [dict(zip(('symbol', 'score', 'low', 'rise', 'recorded_at'), row)) for row in rows]
+
+    def alerts(self, symbol=None, job=None, days=30, now=None):
+        """Alerts sent within the last `days`, newest first, optionally for one symbol and/or job."""
+        cutoff = (now or time.time()) - days * 86400
+        query = "SELECT job, symbol, kind, details, recorded_at FROM alerts WHERE recorded_at >= ?"
+        params = [cutoff]
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol.upper())
+        if job:
+            query += " AND job = ?"
+            params.append(job)
+        query += " ORDER BY recorded_at DESC"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {'job': job, 'symbol': symbol, 'kind': kind, 'details': json.loads(details) if details else {},
+             'recorded_at': recorded_at}
+            for job, symbol, kind, details, recorded_at in rows
+        ]
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Query breakout scores and alerts recorded across runs.")
+    parser.add_argument('--path', default=None, help="History database (default RUN_HISTORY_PATH)")
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--json', action='store_true', help="Print the result as JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+    trend_parser = commands.add_parser('trend', help="Score trend of one symbol")
+    trend_parser.add_argument('symbol')
+    risers_parser = commands.add_parser('risers', help="Symbols whose score rose by at least --min-rise")
+    risers_parser.add_argument('--min-rise', type=float, default=3)
+    alerts_parser = commands.add_parser('alerts', help="Alerts sent, newest first")
+    alerts_parser.add_argument('--symbol', default=None)
+    alerts_parser.add_argument('--job', choices=['breakouts', 'assets'], default=None)
+    args = parser.parse_args()
+
+    store = RunHistoryStore(path=args.path)
+    start = time.perf_counter()
+    if args.command == 'trend':
+        result = [{'recorded_at': recorded_at, 'score': score} for recorded_at, score in store.score_trend(args.symbol, args.days)]
+    elif args.command == 'risers':
+        result = store.risers(args.min_rise, args.days)
+    else:
+        result = store.alerts(args.symbol, args.job, args.days)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        if not result:
+            print("No history in this window.")
+        for entry in result:
+            if args.command == 'trend':
+                print(f"{_format_time(entry['recorded_at'])}  {entry['score']}")
+            elif args.command == 'risers':
+                print(f"{entry['symbol']:<8} {entry['low']:>4} → {entry['score']:<4} (+{entry['rise']})  "
+                      f"{_format_time(entry['recorded_at'])}")
+            else:
+                details = ', '.join(f"{key}: {value}" for key, value in entry['details'].items())
+                print(f"{_format_time(entry['recorded_at'])}  {entry['job']:<9} {entry['symbol']:<8} {entry['kind']:<8} {details}")
+        print(f"({elapsed * 1000:.1f} ms)")
@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import sqlite3
+
+class ScanCheckpoint:
+    """
+    Per-symbol results of an in-progress KuCoin scan, written as each symbol finishes,
+    so a scan that is killed partway through resumes where it stopped.
+    Rows are grouped by scope (e.g. 'assets', 'breakouts') so different scans don't
+    reuse each other's results, and are ignored once older than `max_age` seconds.
+    A symbol that was scanned but filtered out is stored with a null result.
+    """
+
+    def __init__(self, path=None, max_age=None):
+        self.path = path or os.getenv('SCAN_CHECKPOINT_PATH', '.state/scan_checkpoints.sqlite')
+        # One 4-hour assets cycle plus slack for delayed scheduled runs, so the next run resumes an interrupted scan
+        self.max_age = float(max_age or os.getenv('SCAN_CHECKPOINT_MAX_AGE_SECONDS', '16200'))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_checkpoints (
+                    scope TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    result TEXT,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (scope, symbol)
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL with NORMAL sync: one small commit per symbol without an fsync each time
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self, scope, symbols=None, now=None):
+        """
+        Return {'SYMBOL': result-or-None} for symbols already completed within the
+        freshness window. Expired rows for the scope are deleted.
+        """
+        cutoff = (now or time.time()) - self.max_age
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scan_checkpoints WHERE scope = ? AND completed_at < ?", (scope, cutoff))
+            rows = conn.execute("SELECT symbol, result FROM scan_checkpoints WHERE scope = ?", (scope,)).fetchall()
+        wanted = set(symbols) if symbols is not None else None
+        return {
+            symbol: json.loads(result) if result is not None else None
+            for symbol, result in rows
+            if wanted is None or symbol in wanted
+        }
+
+    def save(self, scope, symbol, result, now=None):
+        """Record one completed symbol (result None when it was filtered out)."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scan_checkpoints (scope, symbol, result, completed_at) VALUES (?, ?, ?, ?)",
+                (scope, symbol, json.dumps(result) if result is not None else None, now or time.time())
+            )
+
+    def clear(self, scope, symbols=None):
+        """Drop the checkpoints of a finished scan (only `symbols`, if given, so parallel shards keep theirs)."""
+        with self._connect() as conn:
+            if symbols is None:
+                conn.execute("DELETE FROM scan_checkpoints WHERE scope = ?", (scope,))
+            else:
+                conn.executemany("DELETE FROM scan_checkpoints WHERE scope = ? AND symbol = ?",
+                                 [(scope, symbol) for symbol in symbols])
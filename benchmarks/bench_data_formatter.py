@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark DataFormatter on synthetic market, social and KuCoin data.
+
+Usage: python benchmarks/bench_data_formatter.py [--sizes 100 1000 10000] [--repeat 5]
+"""
+import os
+import sys
+import copy
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.formatters.data_formatter import DataFormatter
+
+
+def make_data(n_coins, seed=42):
+    """Build CoinGecko-, social- and KuCoin-shaped inputs for n_coins coins."""
+    rng = random.Random(seed)
+    market_data = []
+    social_data = {}
+    kucoin_data = {}
+    for i in range(n_coins):
+        symbol = f"c{i}"
+        market_data.append({
+            'id': f"coin-{i}",
+            'symbol': symbol,
+            'name': f"Coin {i}",
+            'current_price': rng.uniform(0.0001, 50000),
+            'market_cap': rng.uniform(1e6, 1e12),
+            'market_cap_rank': i + 1,
+            'total_volume': rng.uniform(1e4, 1e10),
+            'price_change_percentage_24h': rng.uniform(-20, 20),
+            'price_change_percentage_7d_in_currency': rng.uniform(-40, 40),
+            'is_trending': rng.random() < 0.05,
+        })
+        social_data[symbol.upper()] = {'reddit_mentions': rng.randint(0, 60)}
+        if rng.random() < 0.5:
+            kucoin_data[symbol.upper()] = {
+                'rsi_1d': round(rng.uniform(10, 90), 2),
+                'rsi_7d': round(rng.uniform(10, 90), 2),
+                'bb_width_1d': round(rng.uniform(2, 60), 2),
+                'atr_pct_1d': round(rng.uniform(1, 15), 2),
+                'volume_zscore_1d': round(rng.gauss(0, 1), 2),
+                'obv_trend_1d': rng.choice(['rising', 'falling', 'flat']),
+            }
+    return {'trending_coins': [], 'market_data': market_data}, social_data, kucoin_data
+
+
+def bench(n_coins, repeat):
+    """Return the best wall time of format_for_gpt over `repeat` runs."""
+    coingecko_data, social_data, kucoin_data = make_data(n_coins)
+    formatter = DataFormatter()
+    timings = []
+    stdout = sys.stdout
+    for _ in range(repeat):
+        data = copy.deepcopy(coingecko_data)
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            start = time.perf_counter()
+            formatter.format_for_gpt(data, social_data, kucoin_data)
+            timings.append(time.perf_counter() - start)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'coins':>8} {'best (ms)':>12}")
+    for size in args.sizes:
+        print(f"{size:>8} {bench(size, args.repeat) * 1000:>12.2f}")
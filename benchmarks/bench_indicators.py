@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark the single-pass IndicatorKernel against computing the same indicators
+with one pandas pass each (ewm/rolling/cumsum) on synthetic OHLCV series.
+
+Usage: python benchmarks/bench_indicators.py [--symbols 100 1000] [--bars 76] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analysis.indicators import IndicatorKernel
+
+
+def make_series(n_symbols, n_bars, seed=42):
+    """Random-walk OHLCV DataFrames shaped like KuCoinCollector._get_ohlc output."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n_bars)))
+        frames.append(pd.DataFrame({
+            'open': np.concatenate([[close[0]], close[:-1]]),
+            'high': close * (1 + rng.uniform(0, 0.02, n_bars)),
+            'low': close * (1 - rng.uniform(0, 0.02, n_bars)),
+            'close': close,
+            'volume': rng.uniform(1e3, 1e6, n_bars),
+        }))
+    return frames
+
+
+def pandas_multi_pass(df):
+    """The same indicators as the kernel, one pandas pass per indicator."""
+    close, high, low, volume = df['close'], df['high'], df['low'], df['volume']
+    change = close.diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    loss = (-change).clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    rsi = 100 * gain / (gain + loss)
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    mean, std = close.rolling(20).mean(), close.rolling(20).std(ddof=0)
+    bb_width = 4 * std / mean * 100
+    true_range = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    atr = true_range.ewm(alpha=1 / 14, adjust=False).mean()
+    volume_zscore = (volume - volume.rolling(20).mean()) / volume.rolling(20).std(ddof=0)
+    obv = (np.sign(change).fillna(0) * volume).cumsum()
+    return rsi.iloc[-1], macd.iloc[-1], signal.iloc[-1], bb_width.iloc[-1], atr.iloc[-1], volume_zscore.iloc[-1], obv.iloc[-1]
+
+
+def bench(n_symbols, n_bars, repeat):
+    """Return the best wall time (seconds) of the kernel and of the pandas passes over every series."""
+    frames = make_series(n_symbols, n_bars)
+    kernel = IndicatorKernel()
+    records = kernel.new_record(n_symbols)
+    kernel_times, pandas_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i, df in enumerate(frames):
+            kernel.compute(df['open'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(),
+                           df['close'].to_numpy(), df['volume'].to_numpy(), out=records[i])
+        kernel_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for df in frames:
+            pandas_multi_pass(df)
+        pandas_times.append(time.perf_counter() - start)
+    return min(kernel_times), min(pandas_times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--bars', type=int, default=76, help="Bars per series (KuCoinCollector keeps limit + 26 = 76)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'kernel (ms)':>12} {'pandas (ms)':>12} {'speedup':>8}")
+    for size in args.symbols:
+        kernel_seconds, pandas_seconds = bench(size, args.bars, args.repeat)
+        print(f"{size:>8} {kernel_seconds * 1000:>12.2f} {pandas_seconds * 1000:>12.2f} {pandas_seconds / kernel_seconds:>7.1f}x")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Run buy_analysis and current_asset_analysis end to end against fake API clients
+and report per-stage timings and peak memory.
+
+Usage: python benchmarks/bench_pipeline.py [--sizes 100 1000 10000] [--scenarios breakouts assets] [--json out.json]
+"""
+import os
+import sys
+import json
+import tempfile
+import argparse
+import importlib
+import contextlib
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fakes import offline_clients, FakeBot
+from app.monitoring.metrics import metrics
+
+SCENARIOS = {
+    'breakouts': ('run_breakouts', 'buy_analysis'),
+    'assets': ('run_assets', 'current_asset_analysis'),
+}
+
+
+def run_scenario(scenario, n_coins, trace_memory=True):
+    """Run one script's main function offline and return its timings and peak memory."""
+    module_name, function_name = SCENARIOS[scenario]
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = {
+            'ALERT_STATE_PATH': os.path.join(state_dir, 'alert_state.json'),
+            'RUN_REPORT_PATH': os.path.join(state_dir, 'run_report.jsonl'),
+            'INDICATOR_SNAPSHOT_PATH': os.path.join(state_dir, 'indicator_snapshots.sqlite'),
+            'SCAN_CHECKPOINT_PATH': os.path.join(state_dir, 'scan_checkpoints.sqlite'),
+            'RUN_HISTORY_PATH': os.path.join(state_dir, 'run_history.sqlite'),
+            'WATCHLIST_SNAPSHOT_PATH': os.path.join(state_dir, 'watchlist.json'),
+        }
+        with offline_clients(n_coins, env), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            # Re-import so module-level settings (thresholds) are read with this size's environment
+            sys.modules.pop(module_name, None)
+            module = importlib.import_module(module_name)
+            main = getattr(module, function_name)
+
+            if trace_memory:
+                tracemalloc.start()
+            exit_code = 0
+            try:
+                main()
+            except SystemExit as e:
+                exit_code = e.code
+            finally:
+                peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+                if trace_memory:
+                    tracemalloc.stop()
+            report = metrics.snapshot()
+
+    return {
+        'scenario': scenario,
+        'coins': n_coins,
+        'exit_code': exit_code,
+        'wall_seconds': report['wall_seconds'],
+        'peak_memory_mb': round(peak / 1024 / 1024, 2) if peak is not None else None,
+        'stages': {name: stats['total_seconds'] for name, stats in report['spans'].items() if name.startswith('stage.')},
+        'counters': report['counters'],
+        'telegram_messages': len(FakeBot.sent),
+    }
+
+
+def print_result(result):
+    memory = f"{result['peak_memory_mb']:.1f} MB" if result['peak_memory_mb'] is not None else 'n/a'
+    status = '' if not result['exit_code'] else f" (exited with {result['exit_code']})"
+    print(f"\n{result['scenario']} @ {result['coins']} coins: {result['wall_seconds']:.2f}s, peak {memory}{status}")
+    for stage, seconds in sorted(result['stages'].items(), key=lambda item: item[1], reverse=True):
+        print(f"  {stage:<20} {seconds:>9.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc (faster, no peak memory)")
+    parser.add_argument('--json', help="Also write all results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for scenario in args.scenarios:
+            result = run_scenario(scenario, size, trace_memory=not args.no_memory)
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
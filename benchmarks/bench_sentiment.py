@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Benchmark batch lexicon sentiment scoring of Reddit titles and its per-symbol aggregation.
+
+Usage: python benchmarks/bench_sentiment.py [--posts 1000 10000 50000] [--symbols 100] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import fixtures
+from app.analysis.sentiment import SentimentScorer
+
+
+def make_titles(n_posts, n_symbols):
+    """Synthetic titles spread over the fixture subreddits, plus the symbol each one mentions first."""
+    symbols = [fixtures.symbol_for(i) for i in range(n_symbols)]
+    per_subreddit = -(-n_posts // len(fixtures.SUBREDDITS))
+    posts = [post for subreddit in fixtures.SUBREDDITS
+             for post in fixtures.reddit_posts(subreddit, symbols, per_subreddit)][:n_posts]
+    titles = [post['title'] for post in posts]
+    first_symbol = {symbol: i for i, symbol in enumerate(symbols)}
+    mentioned = [first_symbol[title.split()[0].lstrip('$')] for title in titles]
+    return titles, mentioned
+
+
+def bench(n_posts, n_symbols, repeat):
+    """Return the best (score seconds, aggregate seconds) over `repeat` runs."""
+    titles, mentioned = make_titles(n_posts, n_symbols)
+    scorer = SentimentScorer()
+    post_index = np.arange(len(titles))
+    score_times, aggregate_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scores = scorer.score(titles)
+        score_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scorer.aggregate(scores, post_index, mentioned, n_symbols)
+        aggregate_times.append(time.perf_counter() - start)
+    return min(score_times), min(aggregate_times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'posts':>8} {'score (ms)':>12} {'aggregate (ms)':>15} {'posts/s':>12}")
+    for size in args.posts:
+        score_seconds, aggregate_seconds = bench(size, args.symbols, args.repeat)
+        print(f"{size:>8} {score_seconds * 1000:>12.2f} {aggregate_seconds * 1000:>15.2f} {size / score_seconds:>12,.0f}")
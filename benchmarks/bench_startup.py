@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Startup-time regression benchmark: time how long importing each entry script
+takes in a fresh interpreter and check that heavy libraries stay unloaded.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--max-seconds 1.0]
+Exits non-zero if a heavy module is imported at startup or the median time exceeds --max-seconds.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must only be imported when the step that needs them runs
+HEAVY_MODULES = ['pandas', 'numpy', 'praw', 'openai', 'tiktoken', 'telegram', 'kucoin']
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+"""
+
+
+def measure(module, repeat):
+    """Import `module` in `repeat` fresh interpreters. Returns (median seconds, heavy modules loaded)."""
+    env = dict(os.environ, ENABLE_KUCOIN_TA='false', SKIP_GPT='true', PYTHONDONTWRITEBYTECODE='1')
+    timings = []
+    loaded = set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        timings.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return statistics.median(timings), sorted(loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=1.0)
+    parser.add_argument('--modules', nargs='+', default=['run_assets', 'run_breakouts'])
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        seconds, loaded = measure(module, args.repeat)
+        print(f"{module:<15} {seconds * 1000:>8.1f} ms   heavy modules loaded: {', '.join(loaded) or 'none'}")
+        if loaded or seconds > args.max_seconds:
+            failed = True
+    sys.exit(1 if failed else 0)
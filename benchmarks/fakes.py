@@ -0,0 +1,185 @@
+"""
+Drop-in fake clients for CoinGeckoAPI, kucoin.client.Market, praw.Reddit,
+openai.OpenAI and telegram.Bot, backed by the synthetic fixtures, plus
+`offline_clients()` which patches them into the app for a benchmark run.
+"""
+import os
+import types
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import fixtures
+
+
+class FakeCoinGeckoAPI:
+    n_coins = 100
+
+    def __init__(self, *args, **kwargs):
+        self._market = fixtures.market_data(self.n_coins)
+
+    def get_search_trending(self):
+        return fixtures.trending(self._market)
+
+    def get_coins_markets(self, vs_currency='usd', per_page=100, page=1, **kwargs):
+        start = (page - 1) * per_page
+        return [dict(coin) for coin in self._market[start:start + per_page]]
+
+
+class FakeMarket:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_kline(self, symbol_pair, interval, **kwargs):
+        return fixtures.klines(symbol_pair, interval)
+
+
+class _FakeSubreddit:
+    def __init__(self, name, symbols):
+        self.name = name
+        self.symbols = symbols
+
+    def hot(self, limit=100):
+        for post in fixtures.reddit_posts(self.name, self.symbols, limit):
+            yield SimpleNamespace(**post)
+
+
+class FakeReddit:
+    symbols = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def subreddit(self, name):
+        return _FakeSubreddit(name, self.symbols)
+
+
+class _FakeCompletions:
+    def create(self, model=None, messages=None, **kwargs):
+        prompt = messages[-1]['content']
+        content = fixtures.gpt_response(prompt)
+        prompt_tokens = sum(len(m['content']) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, *args, **kwargs):
+        self.chat = SimpleNamespace(completions=_FakeCompletions())
+
+    def with_options(self, **kwargs):
+        return self
+
+
+class FakeEncoding:
+    """Stands in for a tiktoken encoding (which would download its vocabulary)."""
+
+    def encode(self, text):
+        return range(len(text) // 4)
+
+
+class FakeBot:
+    sent = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def send_message(self, chat_id=None, text=None, **kwargs):
+        FakeBot.sent.append((chat_id, len(text)))
+        return SimpleNamespace(message_id=len(FakeBot.sent))
+
+
+def fake_requests_get(original):
+    """requests.get that serves the watchlist sheet CSV from the fixtures and fetches anything else normally."""
+
+    def get(url, *args, **kwargs):
+        if 'docs.google.com' in str(url):
+            content = '\n'.join(['Symbols', *FakeReddit.symbols]).encode()
+            return SimpleNamespace(status_code=200, content=content, headers={}, raise_for_status=lambda: None)
+        return original(url, *args, **kwargs)
+    return get
+
+
+def _no_sleep_time(module):
+    """A copy of the `time` module whose sleep() returns immediately."""
+    shim = types.ModuleType('time')
+    shim.__dict__.update(module.__dict__)
+    shim.sleep = lambda seconds: None
+    return shim
+
+
+@contextmanager
+def offline_clients(n_coins, env=None):
+    """
+    Patch every external client used by the pipeline with a fake serving
+    n_coins coins, disable the collectors' rate-limit sleeps and set the
+    environment for a full offline run. Everything is restored on exit.
+    """
+    import time
+    import praw
+    import openai
+    import requests
+    import telegram
+    import tiktoken
+    import kucoin.client
+    import app.collectors.coingecko_collector as coingecko_module
+    import app.collectors.social_collector as social_module
+
+    FakeCoinGeckoAPI.n_coins = n_coins
+    FakeReddit.symbols = [fixtures.symbol_for(i) for i in range(n_coins)]
+    FakeBot.sent = []
+
+    patches = [
+        (coingecko_module, 'CoinGeckoAPI', FakeCoinGeckoAPI),
+        (kucoin.client, 'Market', FakeMarket),
+        (praw, 'Reddit', FakeReddit),
+        (openai, 'OpenAI', FakeOpenAI),
+        (tiktoken, 'encoding_for_model', lambda model: FakeEncoding()),
+        (telegram, 'Bot', FakeBot),
+        (coingecko_module, 'time', _no_sleep_time(time)),
+        (social_module, 'time', _no_sleep_time(time)),
+        (requests, 'get', fake_requests_get(requests.get)),
+    ]
+    environment = {
+        'TOP_COINS_LIMIT': str(n_coins),
+        'MAX_COINS_TO_ANALYZE': '50',
+        'ENABLE_KUCOIN_TA': 'true',
+        'KUCOIN_REQUEST_DELAY': '0',
+        'SKIP_GPT': 'false',
+        'OPENAI_API_KEY': 'offline',
+        'REDDIT_CLIENT_ID': 'offline',
+        'REDDIT_CLIENT_SECRET': 'offline',
+        'TELEGRAM_BOT_TOKEN': 'offline',
+        'TELEGRAM_CHAT_ID': '1',
+        'TELEGRAM_CHAT_IDS': '',
+        'TELEGRAM_USE_QUEUE': 'false',
+        'SCAN_WORKERS': '1',
+        'SCAN_QUEUE_PATH': '',
+        'CURRENT_ASSET_SHEET_ID': 'offline',
+    }
+    environment.update(env or {})
+
+    saved_attributes = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    saved_env = {key: os.environ.get(key) for key in environment}
+    try:
+        for module, name, fake in patches:
+            setattr(module, name, fake)
+        os.environ.update(environment)
+        yield
+    finally:
+        for module, name, original in saved_attributes:
+            setattr(module, name, original)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
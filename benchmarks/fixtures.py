@@ -0,0 +1,119 @@
+"""
+Deterministic synthetic fixtures shaped like the real API payloads:
+CoinGecko market lists, KuCoin klines, Reddit listings and GPT responses.
+"""
+import json
+import time
+import random
+
+SUBREDDITS = ['CryptoCurrency', 'CryptoMarkets', 'Altcoin', 'Solana', 'DeFi', 'CryptoMoonShots', 'Cardano']
+
+
+def symbol_for(index):
+    """Unique upper-case ticker for a coin index: A..Z, then AA, AB, ..."""
+    letters = ''
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return f"X{letters}"
+
+
+def market_data(n_coins, seed=42):
+    """CoinGecko get_coins_markets() payload for n_coins coins, ordered by market cap."""
+    rng = random.Random(seed)
+    coins = []
+    market_cap = 1e12
+    for i in range(n_coins):
+        market_cap *= rng.uniform(0.9, 0.999)
+        price = rng.uniform(0.0001, 50000)
+        coins.append({
+            'id': f"coin-{i}",
+            'symbol': symbol_for(i).lower(),
+            'name': f"Coin {i}",
+            'image': f"https://example.com/{i}.png",
+            'current_price': price,
+            'market_cap': market_cap,
+            'market_cap_rank': i + 1,
+            'fully_diluted_valuation': market_cap * rng.uniform(1, 2),
+            'total_volume': market_cap * rng.uniform(0.001, 0.2),
+            'high_24h': price * 1.05,
+            'low_24h': price * 0.95,
+            'price_change_24h': price * rng.uniform(-0.1, 0.1),
+            'price_change_percentage_24h': rng.uniform(-20, 20),
+            'market_cap_change_24h': market_cap * rng.uniform(-0.1, 0.1),
+            'market_cap_change_percentage_24h': rng.uniform(-20, 20),
+            'circulating_supply': rng.uniform(1e6, 1e11),
+            'total_supply': rng.uniform(1e6, 1e11),
+            'max_supply': None,
+            'ath': price * rng.uniform(1, 10),
+            'ath_change_percentage': rng.uniform(-99, 0),
+            'ath_date': '2021-11-10T14:24:11.849Z',
+            'atl': price * rng.uniform(0.01, 1),
+            'atl_change_percentage': rng.uniform(0, 10000),
+            'atl_date': '2015-10-20T00:00:00.000Z',
+            'roi': None,
+            'last_updated': '2024-01-01T00:00:00.000Z',
+            'price_change_percentage_24h_in_currency': rng.uniform(-20, 20),
+            'price_change_percentage_7d_in_currency': rng.uniform(-40, 40),
+        })
+    return coins
+
+
+def trending(market, count=15, seed=42):
+    """CoinGecko get_search_trending() payload picking coins from the market list."""
+    rng = random.Random(seed)
+    picks = rng.sample(market, min(count, len(market)))
+    return {'coins': [{'item': {'id': coin['id'], 'symbol': coin['symbol'], 'name': coin['name']}} for coin in picks]}
+
+
+def klines(symbol_pair, interval, count=100):
+    """KuCoin get_kline() payload: newest first, every field a string."""
+    rng = random.Random(f"{symbol_pair}-{interval}")
+    step = 7 * 86400 if interval == '1week' else 86400
+    now = int(time.time()) // step * step
+    price = rng.uniform(0.01, 1000)
+    rows = []
+    for i in range(count):
+        open_price = price
+        price *= rng.uniform(0.93, 1.08)
+        high = max(open_price, price) * rng.uniform(1, 1.03)
+        low = min(open_price, price) * rng.uniform(0.97, 1)
+        volume = rng.uniform(1e3, 1e6)
+        rows.append([str(now - (count - 1 - i) * step), f"{open_price:.6f}", f"{price:.6f}",
+                     f"{high:.6f}", f"{low:.6f}", f"{volume:.4f}", f"{volume * price:.4f}"])
+    return list(reversed(rows))
+
+
+def reddit_posts(subreddit, symbols, limit=100, seed=42):
+    """Hot posts for a subreddit; titles mention symbols, skewed towards the first (largest) coins."""
+    rng = random.Random(f"{seed}-{subreddit}")
+    popular = symbols[:max(1, min(len(symbols), 40))]
+    words = ['moon', 'bullish', 'dump', 'breakout', 'hodl', 'rug', 'pump', 'scam', 'gem', 'rally', 'crash', 'buy']
+    posts = []
+    for i in range(limit):
+        mentioned = rng.sample(popular, min(2, len(popular))) + [rng.choice(symbols)]
+        title = ' '.join([f"${mentioned[0]}", rng.choice(words), mentioned[1], rng.choice(words), mentioned[2], '?'])
+        posts.append({
+            'title': title,
+            'score': rng.randint(0, 5000),
+            'url': f"https://reddit.com/r/{subreddit}/{i}",
+            'created_utc': time.time() - rng.uniform(0, 86400),
+            'num_comments': rng.randint(0, 500),
+        })
+    return posts
+
+
+def gpt_response(prompt_content, seed=42):
+    """JSON content a model would return for a prompt built by GPTAnalyzer._build_prompt."""
+    rng = random.Random(seed)
+    symbols = [line.split(':', 1)[1].strip() for line in prompt_content.splitlines() if line.startswith('- Symbol:')]
+    return json.dumps({'analysis': [
+        {
+            'coin_symbol': symbol,
+            'breakout_score': rng.randint(0, 10),
+            'reason': f"Synthetic reason for {symbol}.",
+            'timestamp': '2024-01-01 12:00:00',
+        }
+        for symbol in symbols
+    ]})
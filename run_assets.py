@@ -4,17 +4,18 @@ import time
 import sys
 from datetime import datetime
 from dotenv import load_dotenv
-import pandas as pd
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Import components
+# Import components (heavy libraries and API clients are loaded on first use)
 from app.collectors.kucoin_collector import KuCoinCollector
+from app.collectors.sharded_scan import ShardedKuCoinScanner
+from app.collectors.watchlist import WatchlistLoader
 from app.output.telegram_sender import TelegramSender
-
-kucoin_collector = KuCoinCollector()
-telegram_sender = TelegramSender()
+from app.state.alert_state import AlertStateStore
+from app.state.run_history import RunHistoryStore
+from app.monitoring.metrics import metrics
 
 # At top of run.py or in a config module
 RSI_SELL_1D_THRESHOLD = int(os.getenv('RSI_SELL_1D_THRESHOLD', '80'))
@@ -25,49 +26,77 @@ print(f"RSI_SELL_7D_THRESHOLD: {RSI_SELL_7D_THRESHOLD}")
 
 def current_asset_analysis():
     """Fetch symbols from Google Sheet, fetch KuCoin RSI data, and send alerts for overbought symbols."""
+    metrics.reset('assets')
     sheet_id = os.getenv('CURRENT_ASSET_SHEET_ID')
     if not sheet_id:
         print("Environment variable CURRENT_ASSET_SHEET_ID is not set.")
         return
-    csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
-    try:
-        df_sheet = pd.read_csv(csv_url)
-    except Exception as e:
-        print(f"Error fetching Google Sheet: {e}")
+    # Conditional fetch against the local snapshot; falls back to the snapshot if Google is unreachable
+    with metrics.span('stage.sheet'):
+        watchlist = WatchlistLoader(sheet_id).load()
+    if watchlist is None:
         return
-    
-    # Locate 'Symbols' column
-    col_symbols = next((col for col in df_sheet.columns if col.lower() == 'symbols'), None)
-    if col_symbols is None:
-        print("No 'Symbols' column found in Google Sheet.")
+
+    symbols = watchlist['symbols']
+    if watchlist['source'] == 'sheet':
+        print(f"Fetched {len(symbols)} symbols from Google Sheet "
+              f"({len(watchlist['added'])} added, {len(watchlist['removed'])} removed).")
+    elif watchlist['source'] == 'unchanged':
+        print(f"Google Sheet unchanged, {len(symbols)} symbols.")
+    else:
+        print(f"Using {len(symbols)} symbols from the watchlist snapshot.")
+    if not symbols:
+        print("No symbols on the watchlist.")
         return
-    
-    symbols = df_sheet[col_symbols].dropna().astype(str).str.upper().tolist()
-    print(f"Fetched {len(symbols)} symbols from Google Sheet.")
-    # Fetch RSI data from KuCoin
-    ku_data = kucoin_collector.collect(symbols)
-    # Build notification list for symbols with both RSIs >70
-    notification_list = []
-    for sym, metrics in ku_data.items():
-        r1 = metrics.get('rsi_1d')
-        r7 = metrics.get('rsi_7d')
-        if r1 >= RSI_SELL_1D_THRESHOLD and r7 >= RSI_SELL_7D_THRESHOLD:
-            notification_list.append({'symbol': sym, 'rsi_1d': r1, 'rsi_7d': r7})
+    collector = KuCoinCollector(checkpoint_scope='assets')
+    if watchlist['added'] or watchlist['removed']:
+        # Added symbols are scanned fresh, removed ones leave the checkpoint and snapshot stores
+        collector.forget(watchlist['added'] + watchlist['removed'])
+    # Fetch RSI data from KuCoin, split across worker processes/machines if configured
+    sharded_scanner = ShardedKuCoinScanner(checkpoint_scope='assets')
+    with metrics.span('stage.kucoin'):
+        if sharded_scanner.sharded:
+            ku_data = sharded_scanner.collect(symbols)
+        else:
+            ku_data = collector.collect(symbols)
+    # Compare against the stored alert state so only new crossings, exits and material RSI moves are sent
+    alert_state = AlertStateStore(rsi_1d_threshold=RSI_SELL_1D_THRESHOLD, rsi_7d_threshold=RSI_SELL_7D_THRESHOLD)
+    if watchlist['added'] or watchlist['removed']:
+        # Drop state for symbols taken off the sheet; skipped when the watchlist is unchanged
+        alert_state.prune(symbols)
+    changes = alert_state.diff(ku_data)
 
-    if not notification_list:
-        print("No symbols with both RSI_1d and RSI_7d > thresholds found.")
+    if not alert_state.has_changes(changes):
+        print("No new, changed or cleared overbought signals since the last alert.")
+        alert_state.save()
         return
+    print(f"Overbought changes - new: {len(changes['new'])}, moved: {len(changes['moved'])}, exited: {len(changes['exited'])}")
     # Build notification message
-    message = "*🚨 SELL Alert: KuCoin Overbought Signals 🚨*\n\n"
-    for item in notification_list:
-        message += f"*{item['symbol']}* - RSI 1D: {item['rsi_1d']}, RSI 7D: {item['rsi_7d']}\n"
-    message += "\n_This is an automated alert by your script._"
-    # Send via Telegram
-    sent = telegram_sender.send_message(message)
+    message = alert_state.format_message(changes)
+    # Start sending via Telegram; with TELEGRAM_USE_QUEUE=true it is delivered while the history store is opened
+    telegram_sender = TelegramSender()
+    with metrics.span('stage.telegram'):
+        delivery = telegram_sender.send_message_later(message)
+    history_path = os.getenv('RUN_HISTORY_PATH', '.state/run_history.sqlite')
+    run_history = RunHistoryStore(path=history_path) if history_path else None
+    with metrics.span('stage.telegram_wait'):
+        sent = telegram_sender.wait_for_delivery(delivery)
     if sent:
         print("Notification sent via Telegram.")
+        # Only record alerts that were delivered, so failed sends are retried next run
+        alert_state.apply(changes)
+        if run_history:
+            run_history.record_alerts('assets', [
+                {'symbol': item['symbol'], 'kind': f"sell_{kind}", 'rsi_1d': item['rsi_1d'], 'rsi_7d': item['rsi_7d']}
+                for kind, items in changes.items() for item in items
+            ])
     else:
         print("Failed to send Telegram notification.") 
+    alert_state.save()
     
 if __name__ == "__main__":
-    current_asset_analysis()
\ No newline at end of file
+    try:
+        current_asset_analysis()
+    finally:
+        metrics.print_summary()
+        metrics.write_report()
\ No newline at end of file
@@ -4,27 +4,23 @@ import time
 import sys
 from datetime import datetime
 from dotenv import load_dotenv
-import pandas as pd
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Import components
-from app.collectors.coingecko_collector import CoinGeckoCollector
-from app.collectors.social_collector import SocialMediaCollector
+# Import components (heavy libraries and API clients are loaded on first use)
 from app.collectors.kucoin_collector import KuCoinCollector
-from app.formatters.data_formatter import DataFormatter
+from app.collectors.social_collector import SocialMediaCollector
 from app.analysis.gpt_analyzer import GPTAnalyzer
 from app.output.telegram_sender import TelegramSender
-
-coingecko = CoinGeckoCollector()
-social_media = SocialMediaCollector()
-kucoin_collector = KuCoinCollector()
-telegram_sender = TelegramSender()
+from app.state.run_history import RunHistoryStore
+from app.monitoring.metrics import metrics
 
 # At top of run.py or in a config module
 RSI_BUY_1D_THRESHOLD = int(os.getenv('RSI_BUY_1D_THRESHOLD', '50'))
 RSI_BUY_7D_THRESHOLD = int(os.getenv('RSI_BUY_7D_THRESHOLD', '50'))
+# Earlier breakout scores per coin shown to GPT and in the report (0 disables)
+RUN_HISTORY_PROMPT_SCORES = int(os.getenv('RUN_HISTORY_PROMPT_SCORES', '5'))
 
 print(f"RSI_BUY_1D_THRESHOLD: {RSI_BUY_1D_THRESHOLD}")
 print(f"RSI_BUY_7D_THRESHOLD: {RSI_BUY_7D_THRESHOLD}")
@@ -32,6 +28,7 @@ print(f"RSI_BUY_7D_THRESHOLD: {RSI_BUY_7D_THRESHOLD}")
 def buy_analysis():
     """Main function to orchestrate the crypto analysis pipeline"""
     start_time = time.time()
+    metrics.reset('breakouts')
     print(f"🔍 Starting crypto signal analysis - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Check for development mode and feature flags
@@ -50,7 +47,9 @@ def buy_analysis():
     
     # CoinGecko data
     print("  - Fetching CoinGecko market data...")
-    coingecko_data = coingecko.collect()
+    from app.collectors.coingecko_collector import CoinGeckoCollector
+    with metrics.span('stage.coingecko'):
+        coingecko_data = CoinGeckoCollector().collect()
     
     # Check if CoinGecko data was successfully retrieved
     if not coingecko_data or 'market_data' not in coingecko_data or not coingecko_data['market_data']:
@@ -65,13 +64,15 @@ def buy_analysis():
     # KuCoin TA data (Conditional)
     kucoin_data = {}
     if enable_kucoin_ta:
-        kucoin_data = kucoin_collector.collect(coin_symbols)
+        with metrics.span('stage.kucoin'):
+            kucoin_data = KuCoinCollector(checkpoint_scope='breakouts').collect(coin_symbols)
     else:
         print("  - KuCoin TA is disabled via environment variable.")
  
     # Social media data
     print("  - Fetching social media mentions...")
-    social_data_full = social_media.collect(coin_symbols)
+    with metrics.span('stage.social'):
+        social_data_full = SocialMediaCollector().collect(coin_symbols)
 
     # Extract the actual mentions dictionary
     social_mentions_data = social_data_full.get('coin_mentions', {})
@@ -81,21 +82,36 @@ def buy_analysis():
     
     # 2. Format data for analysis
     print("\n🧹 Formatting data...")
+    from app.formatters.data_formatter import DataFormatter
     formatter = DataFormatter()
-    formatted_data = formatter.format_for_gpt(coingecko_data, social_mentions_data, kucoin_data)
+    with metrics.span('stage.format'):
+        formatted_data = formatter.format_for_gpt(coingecko_data, social_mentions_data, kucoin_data)
     
     if not formatted_data:
         print("  ❌ Error: No data available after formatting. Exiting.")
         sys.exit(1)
     
     print(f"  ✓ Formatted data for {len(formatted_data)} coins")
+
+    # Scores from earlier runs, so GPT and the report can see each coin's trend
+    history_path = os.getenv('RUN_HISTORY_PATH', '.state/run_history.sqlite')
+    run_history = RunHistoryStore(path=history_path) if history_path else None
+    score_history = {}
+    if run_history and RUN_HISTORY_PROMPT_SCORES > 0:
+        with metrics.span('stage.history'):
+            score_history = run_history.recent_scores([coin.get('symbol', '') for coin in formatted_data],
+                                                      limit=RUN_HISTORY_PROMPT_SCORES)
+        for coin in formatted_data:
+            coin['previous_scores'] = score_history.get(str(coin.get('symbol', '')).upper())
+        print(f"  ✓ Found earlier scores for {len(score_history)} coins")
     
     # 3. Analyze data using GPT (Conditional)
     analysis_result = {}
     if not skip_gpt:
         print("\n🧠 Analyzing data with GPT...")
         analyzer = GPTAnalyzer()
-        analysis_result = analyzer.analyze(formatted_data)
+        with metrics.span('stage.gpt'):
+            analysis_result = analyzer.analyze(formatted_data)
         if analysis_result and 'analysis' in analysis_result:
             print(f"  ✓ GPT analysis complete. Found potential breakouts for {len(analysis_result.get('analysis', []))} coins.")
         else:
@@ -109,10 +125,24 @@ def buy_analysis():
             'analysis': [{'coin_symbol': coin.get('symbol'), 'breakout_score': '0', 'reason': 'GPT analysis skipped'} for coin in formatted_data]
         }
     
-    # Send to Telegram
-    send_status = telegram_sender.send_analysis(analysis_result, coingecko_data, social_mentions_data, kucoin_data)
+    # Start the Telegram send first; with TELEGRAM_USE_QUEUE=true it is delivered while the scores are recorded
+    telegram_sender = TelegramSender()
+    with metrics.span('stage.telegram'):
+        delivery = telegram_sender.send_analysis_later(analysis_result, coingecko_data, social_mentions_data,
+                                                       kucoin_data, score_history)
+
+    run_id = run_history.record_analysis(analysis_result) if run_history else None
+
+    # Alerts are only recorded once Telegram confirms delivery
+    with metrics.span('stage.telegram_wait'):
+        send_status = telegram_sender.wait_for_delivery(delivery)
     if send_status:
         print("  ✓ Telegram notification sent successfully.")
+        if run_history:
+            run_history.record_alerts('breakouts', [
+                {'symbol': coin.get('coin_symbol', ''), 'kind': 'breakout', 'score': coin.get('breakout_score')}
+                for coin in telegram_sender.top_coins(analysis_result) if coin.get('coin_symbol')
+            ], run_id)
     else:
         print("  ❌ Failed to send Telegram notification.")
     
@@ -120,4 +150,9 @@ def buy_analysis():
     print(f"\n✅ Crypto signal analysis finished in {end_time - start_time:.2f} seconds.")
 
 if __name__ == "__main__":
-    buy_analysis()
\ No newline at end of file
+    try:
+        buy_analysis()
+    finally:
+        # Printed and written even when the run exits early, so failed runs can be compared too
+        metrics.print_summary()
+        metrics.write_report()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analysis.backtest import RSIBacktester
+from app.analysis.indicators import IndicatorKernel
+from app.collectors.kucoin_collector import OHLC_BARS
+
+
+def live_rsi(closes):
+    """RSI as the live scan computes it: IndicatorKernel on the last OHLC_BARS candles."""
+    closes = np.asarray(closes, dtype=float)[-OHLC_BARS:]
+    ones = np.ones(len(closes))
+    return float(IndicatorKernel().compute(closes, closes, closes, closes, ones)['rsi'])
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(3)
+    index = pd.date_range('2022-01-01', periods=700, freq='D')
+    data = {
+        'OLD': 100 * np.exp(np.cumsum(rng.normal(0, 0.04, len(index)))),
+        # Listed recently: only a short weekly history
+        'NEW': np.concatenate([np.full(560, np.nan), 5 * np.exp(np.cumsum(rng.normal(0, 0.06, 140)))]),
+    }
+    return pd.DataFrame(data, index=index)
+
+
+def test_daily_rsi_equals_live_rsi(closes):
+    rsi = RSIBacktester().daily_rsi(closes)
+    for symbol in closes:
+        series = closes[symbol].dropna()
+        for day in series.index[::7]:
+            expected = live_rsi(series[:day])
+            assert rsi.at[day, symbol] == pytest.approx(expected, abs=1e-8, nan_ok=True)
+
+
+def test_weekly_rsi_equals_live_rsi_with_open_week(closes):
+    backtester = RSIBacktester()
+    rsi = backtester.weekly_rsi(closes)
+    for symbol in closes:
+        series = closes[symbol].dropna()
+        for day in series.index[::5]:
+            # The weekly candles KuCoin would return on that day, the last one still open
+            weekly = series[:day].resample(backtester.week_anchor).last().dropna()
+            expected = live_rsi(weekly)
+            assert rsi.at[day, symbol] == pytest.approx(expected, abs=1e-8, nan_ok=True)
+    # Weekly RSI needs 15 weekly candles, which NEW only has near the end
+    assert rsi['NEW'].notna().sum() > 0
+    assert rsi['NEW'].isna().sum() > 560
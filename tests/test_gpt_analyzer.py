@@ -0,0 +1,33 @@
+from app.analysis.gpt_analyzer import GPTAnalyzer
+from app.state.run_history import RunHistoryStore
+
+
+def make_analyzer(monkeypatch, tmp_path, hedge_after='2'):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.setenv('RUN_HISTORY_PATH', str(tmp_path / 'run_history.sqlite'))
+    monkeypatch.setenv('GPT_HEDGE_AFTER_SECONDS', hedge_after)
+    monkeypatch.setenv('GPT_HEDGE_PERCENTILE', '50')
+    return GPTAnalyzer()
+
+
+def test_prompt_tokens_unset_before_prompt_is_built(monkeypatch, tmp_path):
+    assert make_analyzer(monkeypatch, tmp_path).prompt_tokens is None
+
+
+def test_hedge_delay_uses_latencies_from_earlier_runs(monkeypatch, tmp_path):
+    first_run = make_analyzer(monkeypatch, tmp_path)
+    assert first_run._hedge_delay() == 2
+    for seconds in (10, 20, 30, 40, 50):
+        first_run._record_latency('gpt-5-nano', seconds)
+
+    # A later process starts with the recorded latencies, so the percentile applies
+    second_run = make_analyzer(monkeypatch, tmp_path)
+    assert second_run.latencies == [10, 20, 30, 40, 50]
+    assert second_run._hedge_delay() == 30
+
+
+def test_latencies_not_loaded_when_hedging_is_off(monkeypatch, tmp_path):
+    RunHistoryStore(str(tmp_path / 'run_history.sqlite')).record_latency('gpt-5-nano', 5)
+    analyzer = make_analyzer(monkeypatch, tmp_path, hedge_after='0')
+    assert analyzer.latencies == []
+    assert analyzer._hedge_delay() is None
@@ -0,0 +1,65 @@
+import sqlite3
+
+from app.state.indicator_snapshot import IndicatorSnapshotStore, MACD_FIELDS
+
+RESULT = {
+    'rsi_1d': 81.5, 'rsi_7d': 72.25,
+    'macd_1d': {'macd_line': 1.5, 'macd_signal': 1.0, 'macd_histogram': 0.5,
+                'histogram_trend': 'increasing', 'histogram_percentage_diff': 25.0},
+    'macd_1w': None,
+    'bb_width_1d': 12.3, 'atr_pct_1d': 4.56, 'volume_zscore_1d': 1.2, 'obv_trend_1d': 'rising',
+    'bb_width_1w': 30.1, 'atr_pct_1w': 9.87, 'volume_zscore_1w': -0.4, 'obv_trend_1w': 'falling',
+}
+
+
+def test_stores_every_indicator_per_timeframe(tmp_path):
+    store = IndicatorSnapshotStore(str(tmp_path / 'snapshots.sqlite'))
+    assert store.upsert({'sol': RESULT}, now=1000) == 2
+    snapshot = store.get(['SOL'], now=1060)['SOL']
+    assert snapshot['1d']['rsi'] == 81.5
+    assert snapshot['1d']['macd']['histogram_trend'] == 'increasing'
+    assert {field: snapshot['1d'][field] for field in ('bb_width', 'atr_pct', 'volume_zscore', 'obv_trend')} == \
+        {'bb_width': 12.3, 'atr_pct': 4.56, 'volume_zscore': 1.2, 'obv_trend': 'rising'}
+    assert snapshot['1w']['macd'] is None
+    assert (snapshot['1w']['atr_pct'], snapshot['1w']['obv_trend']) == (9.87, 'falling')
+    assert snapshot['1w']['age_seconds'] == 60
+
+
+def test_snapshot_files_without_the_extra_columns_are_migrated(tmp_path):
+    path = str(tmp_path / 'snapshots.sqlite')
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"""
+            CREATE TABLE indicator_snapshots (
+                symbol TEXT NOT NULL, timeframe TEXT NOT NULL, rsi REAL,
+                {', '.join(f'{field} {"TEXT" if field == "histogram_trend" else "REAL"}' for field in MACD_FIELDS)},
+                updated_at REAL NOT NULL, PRIMARY KEY (symbol, timeframe)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("INSERT INTO indicator_snapshots (symbol, timeframe, rsi, updated_at) VALUES ('BTC', '1d', 55.0, 1000)")
+    store = IndicatorSnapshotStore(path)
+    assert store.get(['BTC'], now=1000)['BTC']['1d']['bb_width'] is None
+    store.upsert({'BTC': RESULT}, now=2000)
+    assert store.get(['BTC'], now=2000)['BTC']['1d']['volume_zscore'] == 1.2
+
+
+def test_evict_deletes_every_timeframe_of_the_symbols(tmp_path):
+    store = IndicatorSnapshotStore(str(tmp_path / 'snapshots.sqlite'))
+    store.upsert({'SOL': RESULT, 'BTC': RESULT}, now=1000)
+    assert store.evict(['sol']) == 2
+    assert list(store.get(['SOL', 'BTC'], now=1000)) == ['BTC']
+
+
+def test_collector_forgets_checkpoints_and_snapshots(tmp_path, monkeypatch):
+    from app.collectors.kucoin_collector import KuCoinCollector
+    monkeypatch.setenv('INDICATOR_SNAPSHOT_PATH', str(tmp_path / 'snapshots.sqlite'))
+    monkeypatch.setenv('SCAN_CHECKPOINT_PATH', str(tmp_path / 'checkpoints.sqlite'))
+    collector = KuCoinCollector(enabled=False, checkpoint_scope='assets')
+    for symbol in ('SOL', 'BTC'):
+        collector.snapshots.upsert({symbol: RESULT})
+        collector.checkpoints.save('assets', symbol, RESULT)
+    collector.checkpoints.save('breakouts', 'SOL', RESULT)
+
+    collector.forget(['SOL'])
+    assert list(collector.checkpoints.load('assets')) == ['BTC']
+    assert list(collector.checkpoints.load('breakouts')) == ['SOL']
+    assert list(collector.snapshots.get(['SOL', 'BTC'])) == ['BTC']
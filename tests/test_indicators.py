@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analysis.indicators import IndicatorKernel
+
+
+def pandas_ta_rsi(close, length=14):
+    """pandas_ta.rsi (0.3.14b), which KuCoinCollector used before IndicatorKernel."""
+    negative = close.diff()
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = positive.ewm(alpha=1 / length, min_periods=length).mean()
+    negative_avg = negative.ewm(alpha=1 / length, min_periods=length).mean()
+    return 100 * positive_avg / (positive_avg + negative_avg.abs())
+
+
+def kernel_rsi(close):
+    close = np.asarray(close, dtype=float)
+    return float(IndicatorKernel().compute(close, close, close, close, np.ones(len(close)))['rsi'])
+
+
+def random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.05, n))))
+
+
+# 76 daily bars as fetched by KuCoinCollector, and short weekly histories of recently listed coins
+@pytest.mark.parametrize('bars', [15, 16, 20, 30, 52, 76])
+@pytest.mark.parametrize('seed', range(20))
+def test_rsi_matches_pandas_ta(bars, seed):
+    close = random_walk(bars, seed)
+    assert kernel_rsi(close) == pytest.approx(pandas_ta_rsi(close).iloc[-1], abs=1e-9)
+
+
+def test_rsi_needs_more_than_period_bars():
+    close = random_walk(14, 0)
+    assert math.isnan(kernel_rsi(close))
+    assert math.isnan(pandas_ta_rsi(close).iloc[-1])
+
+
+def test_rsi_of_flat_series_is_undefined_like_pandas_ta():
+    close = pd.Series([5.0] * 30)
+    assert math.isnan(kernel_rsi(close))
+    assert math.isnan(pandas_ta_rsi(close).iloc[-1])
+
+
+def test_rsi_of_rising_series_is_100():
+    assert kernel_rsi(np.arange(1, 31)) == pytest.approx(100.0)
@@ -0,0 +1,67 @@
+import json
+import sqlite3
+import time
+
+from app.collectors.sharded_scan import ShardQueue
+
+
+def finish_all(queue, run_id, counters):
+    while True:
+        claimed = queue.claim(run_id)
+        if claimed is None:
+            return
+        _, shard, symbols = claimed
+        queue.complete(run_id, shard, {symbol: {'rsi_1d': 50} for symbol in symbols}, counters)
+
+
+def test_counters_are_summed_per_run_and_exclude_the_coordinator(tmp_path):
+    path = str(tmp_path / 'queue.sqlite')
+    remote = ShardQueue(path)
+    remote.worker_id = 'remote:1'
+    assert remote.publish('run-1', ['A', 'B', 'C'], 1) == 3
+    finish_all(remote, 'run-1', {'kucoin.requests': 2})
+
+    coordinator = ShardQueue(path)
+    assert coordinator.counters('run-1', exclude_worker=coordinator.worker_id) == {'kucoin.requests': 6}
+    assert coordinator.counters('run-1', exclude_worker='remote:1') == {}
+    assert sorted(coordinator.results('run-1')) == ['A', 'B', 'C']
+
+
+def test_purge_deletes_only_that_run(tmp_path):
+    queue = ShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.publish('run-1', ['A', 'B'], 1)
+    queue.publish('run-2', ['C'], 1)
+    finish_all(queue, 'run-1', {})
+    queue.purge('run-1')
+    assert queue.progress('run-1') == (0, 0)
+    assert queue.progress('run-2') == (0, 1)
+
+
+def test_abandoned_runs_are_deleted_after_retention(tmp_path, monkeypatch):
+    monkeypatch.setenv('SCAN_QUEUE_RETENTION_SECONDS', '60')
+    queue = ShardQueue(str(tmp_path / 'queue.sqlite'))
+    queue.publish('old', ['A'], 1)
+    with sqlite3.connect(queue.path) as conn:
+        conn.execute("UPDATE scan_shards SET published_at = ?", (time.time() - 120,))
+    queue.publish('new', ['B'], 1)
+    assert queue.progress('old') == (0, 0)
+    assert queue.progress('new') == (0, 1)
+
+
+def test_queue_files_without_the_new_columns_are_migrated(tmp_path):
+    path = str(tmp_path / 'queue.sqlite')
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE scan_shards (
+                run_id TEXT NOT NULL, shard INTEGER NOT NULL, symbols TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending', worker TEXT, claimed_at REAL, result TEXT,
+                PRIMARY KEY (run_id, shard)
+            )
+        """)
+        conn.execute("INSERT INTO scan_shards (run_id, shard, symbols) VALUES ('legacy', 0, ?)", (json.dumps(['A']),))
+    queue = ShardQueue(path)
+    # The legacy run has no publish time, so it counts as abandoned
+    queue.publish('run-1', ['B'], 1)
+    assert queue.progress('legacy') == (0, 0)
+    finish_all(queue, 'run-1', {'kucoin.requests': 1})
+    assert queue.counters('run-1') == {'kucoin.requests': 1}
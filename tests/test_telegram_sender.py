@@ -0,0 +1,136 @@
+import re
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+import telegram
+
+from app.output.telegram_sender import TelegramSender, split_markdown_message, MARKDOWN_ENTITY_PATTERN
+
+
+def words(text):
+    return text.split()
+
+
+def content(text):
+    return re.sub(r"\s", '', text)
+
+
+class FakeBot:
+    """Stands in for telegram.Bot: holds every send until `release` is set, then records it."""
+    release = None
+    sent = []
+    error = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def send_message(self, chat_id=None, text=None, **kwargs):
+        while not FakeBot.release.is_set():
+            await asyncio.sleep(0.01)
+        if FakeBot.error:
+            raise FakeBot.error
+        FakeBot.sent.append((chat_id, text))
+        return SimpleNamespace(message_id=len(FakeBot.sent))
+
+
+@pytest.fixture
+def queued_sender(monkeypatch):
+    monkeypatch.setattr(telegram, 'Bot', FakeBot)
+    monkeypatch.setattr(FakeBot, 'release', threading.Event())
+    monkeypatch.setattr(FakeBot, 'sent', [])
+    monkeypatch.setattr(FakeBot, 'error', None)
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'token')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '1')
+    monkeypatch.setenv('TELEGRAM_CHAT_IDS', '1,2:7')
+    monkeypatch.setenv('TELEGRAM_USE_QUEUE', 'true')
+    monkeypatch.setenv('TELEGRAM_CHAT_INTERVAL', '0')
+    monkeypatch.setenv('TELEGRAM_FLUSH_TIMEOUT', '5')
+    sender = TelegramSender()
+    yield sender
+    FakeBot.release.set()
+    sender.close()
+
+
+def test_queued_send_does_not_block_until_delivery(queued_sender):
+    delivery = queued_sender.send_message_later("*Alert*")
+    # The caller gets control back while the bot is still sending
+    assert not delivery.done()
+    FakeBot.release.set()
+    assert queued_sender.wait_for_delivery(delivery) is True
+    assert sorted(FakeBot.sent) == [('1', "*Alert*"), ('2', "*Alert*")]
+
+
+def test_queued_send_reports_failed_delivery(queued_sender):
+    FakeBot.error = RuntimeError("Forbidden: bot was blocked by the user")
+    delivery = queued_sender.send_message_later("*Alert*")
+    FakeBot.release.set()
+    assert queued_sender.wait_for_delivery(delivery) is False
+    assert FakeBot.sent == []
+
+
+def test_short_message_is_not_split():
+    assert split_markdown_message("*Hi* there") == ["*Hi* there"]
+
+
+def test_chunk_never_exceeds_limit_after_early_line_break():
+    text = 'a\n' + 'b' * 4092 + ' ' + 'd' * 3000 + ' e'
+    chunks = split_markdown_message(text)
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    # The line break right after 'a' is not used, so no tiny leading chunk is sent
+    assert len(chunks) == 2
+    assert chunks[0].startswith('a\nbbb')
+    assert words(' '.join(chunks)) == words(text)
+
+
+def test_prefers_paragraph_breaks():
+    paragraph = ' '.join(['word'] * 150)
+    text = '\n\n'.join([paragraph] * 4)
+    chunks = split_markdown_message(text, limit=2000)
+    assert chunks == ['\n\n'.join([paragraph] * 2)] * 2
+
+
+def test_entities_are_not_split():
+    rng = random.Random(7)
+    lines = []
+    for i in range(300):
+        lines.append(f"*{i}. COIN{i} - Score: {rng.randint(0, 10)}/10* \n _{' '.join(['reason'] * rng.randint(1, 30))}_\n")
+    text = '\n'.join(lines)
+    chunks = split_markdown_message(text, limit=1000)
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    for chunk in chunks:
+        # Every chunk has balanced markers, i.e. every entity is complete
+        assert chunk.count('*') % 2 == 0
+        assert chunk.count('_') % 2 == 0
+    entities = [match.group(0) for match in MARKDOWN_ENTITY_PATTERN.finditer(text)]
+    assert [match.group(0) for chunk in chunks for match in MARKDOWN_ENTITY_PATTERN.finditer(chunk)] == entities
+
+
+def test_oversized_entity_is_hard_split_with_markers():
+    text = 'intro\n*' + 'x' * 250 + '*'
+    chunks = split_markdown_message(text, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    bold = [chunk for chunk in chunks if chunk.startswith('*')]
+    assert all(re.fullmatch(r"\*x+\*", chunk) for chunk in bold)
+    assert sum(len(chunk) - 2 for chunk in bold) == 250
+
+
+def test_random_text_respects_limit_and_keeps_content():
+    rng = random.Random(42)
+    tokens = []
+    for _ in range(3000):
+        tokens.append(rng.choice(['word', 'longer' * rng.randint(1, 40), '*bold text*', '_it_', '\n', '\n\n', '`code`']))
+    text = ' '.join(tokens)
+    for limit in (50, 300, 4096):
+        chunks = split_markdown_message(text, limit=limit)
+        assert all(0 < len(chunk) <= limit for chunk in chunks)
+        # Over-long words are hard-split, so compare everything but whitespace
+        assert content(''.join(chunks)) == content(text)